@@ -1,137 +1,189 @@
-import websockets
 import asyncio
-import json
-import requests
 import google.generativeai as genai
 import os
-import re
+from analysis_scheduler import AnalysisScheduler
+from decision_cache import DecisionCache
+from feed_connection import STREAM_URIS, FeedManager
+from feed_decoding import MarketTick, PlayerEvent
+from feed_subscription import Subscription, load_roster, parse_list
+from player_history import HistoryStore
+from order_client import ORDER_URL, OrderClient
+from trade_decisions import (
+    BATCH_DECISION_CONFIG, DECISION_CONFIG, DecisionError, build_batch_prompt, build_prompt, parse_batch_decisions,
+    parse_decision, supports_json_mode
+)
 
 # Configure Gemini API
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 genai.configure(api_key=GOOGLE_API_KEY)
-model = genai.GenerativeModel('gemini-pro')
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
+model = genai.GenerativeModel(GEMINI_MODEL)
 
-# Store player events and market data
-player_data = {}
+# Request decisions in Gemini's JSON mode with the decision schema. It defaults to on only for models
+# that support it; without it the prompt still asks for the same JSON. Orders below MIN_CONFIDENCE are skipped.
+LLM_JSON_MODE = os.getenv('LLM_JSON_MODE', '1' if supports_json_mode(GEMINI_MODEL) else '0') == '1'
+MIN_CONFIDENCE = float(os.getenv('MIN_CONFIDENCE', '0.5'))
+decision_stats = {"accepted": 0, "rejected": 0}
+
+# Decisions remembered while a player's last events and bucketed price are unchanged: at most
+# DECISION_CACHE_SIZE entries (0 disables the cache) for DECISION_CACHE_TTL seconds, DECISION_PRICE_BUCKET
+# as a fraction. A decision was already acted on when it was made, so a hit skips both Gemini and the order.
+decision_cache = DecisionCache(
+    maxsize=int(os.getenv('DECISION_CACHE_SIZE', '4096')),
+    ttl=float(os.getenv('DECISION_CACHE_TTL', '300')),
+    price_bucket=float(os.getenv('DECISION_PRICE_BUCKET', '0.01'))
+)
+
+# Maximum concurrent Gemini requests and per-request timeout in seconds
+LLM_CONCURRENCY = int(os.getenv('LLM_CONCURRENCY', '4'))
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '30'))
+llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
+# Analysis workers, debounce window and longest coalescing delay in seconds
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '4'))
+ANALYSIS_DEBOUNCE = float(os.getenv('ANALYSIS_DEBOUNCE', '1.0'))
+ANALYSIS_MAX_DELAY = float(os.getenv('ANALYSIS_MAX_DELAY', '5.0'))
+# Players per Gemini request, and how long a partial batch waits for more players to come due
+ANALYSIS_BATCH_SIZE = int(os.getenv('ANALYSIS_BATCH_SIZE', '1'))
+ANALYSIS_BATCH_WAIT = float(os.getenv('ANALYSIS_BATCH_WAIT', '0.5'))
+
+# Pooled async order submission; ORDER_BATCH_URL enables sending same-tick orders as one request
+order_client = OrderClient(
+    url=os.getenv('ORDER_URL', ORDER_URL),
+    timeout=float(os.getenv('ORDER_TIMEOUT', '5')),
+    batch_url=os.getenv('ORDER_BATCH_URL')
+)
+
+# Market and event feeds: one multiplexed connection when FEED_MULTIPLEX_URI is set and
+# accepted, otherwise one connection per stream. FEED_IDLE_TIMEOUT reconnects a silent feed.
+FEED_MULTIPLEX_URI = os.getenv('FEED_MULTIPLEX_URI')
+FEED_IDLE_TIMEOUT = float(os.getenv('FEED_IDLE_TIMEOUT', '30'))
+
+# Players to trade, as comma-separated symbols, names, IDs or positions (all players when unset).
+# Symbols, IDs and positions are resolved to names through players_data.json. FEED_SERVER_FILTER sends the
+# subscription to the server as well.
+def agent_subscription():
+    subscription = Subscription(
+        symbols=parse_list(os.getenv('AGENT_SYMBOLS')),
+        players=parse_list(os.getenv('AGENT_PLAYERS')),
+        player_ids=parse_list(os.getenv('AGENT_PLAYER_IDS')),
+        positions=parse_list(os.getenv('AGENT_POSITIONS'))
+    )
+    if subscription.symbols or subscription.player_ids or subscription.positions:
+        try:
+            subscription = subscription.with_roster(load_roster())
+        except (OSError, ValueError) as e:
+            print(f"Could not load players_data.json, filtering symbols, IDs and positions after decoding: {e}")
+    return subscription
+
+subscription = agent_subscription()
+FEED_SERVER_FILTER = os.getenv('FEED_SERVER_FILTER', '0') == '1'
+
+# Store player events and market data in bounded per-player histories
+PRICE_HISTORY = int(os.getenv('PRICE_HISTORY', '1024'))
+EVENT_HISTORY = int(os.getenv('EVENT_HISTORY', '32'))
+player_data = HistoryStore(price_capacity=PRICE_HISTORY, event_capacity=EVENT_HISTORY)
 # Map player names to symbols
 player_symbol_map = {}
 
-async def market_data_listener():
-    uri = "ws://localhost:3030/ws/market"
-    while True:
-        try:
-            async with websockets.connect(uri) as websocket:
-                print("Connected to market WebSocket")
-                while True:
-                    try:
-                        message = await websocket.recv()
-                        data = json.loads(message)
-                        if data["type"] == "market_data":
-                            player = data["data"]["player"]
-                            symbol = data["data"]["symbol"]
-                            # Add to player-symbol map if not already present
-                            if player not in player_symbol_map:
-                                player_symbol_map[player] = symbol
-                            if player not in player_data:
-                                player_data[player] = {"market": [], "events": []}
-                            player_data[player]["market"].append(data["data"])
-                            # print(f"Market update for {player}: {data['data']}")
-                            await analyze_and_trade(player)
-                    except websockets.exceptions.ConnectionClosed:
-                        print("Market WebSocket connection closed, reconnecting...")
-                        break
-                    except Exception as e:
-                        print(f"Error in market WebSocket: {e}")
-                        break
-        except Exception as e:
-            print(f"Failed to connect to market WebSocket: {e}")
-        await asyncio.sleep(5)  # Wait before reconnecting
-
-async def event_data_listener():
-    uri = "ws://localhost:3030/ws/events"
-    while True:
-        try:
-            async with websockets.connect(uri) as websocket:
-                print("Connected to events WebSocket")
-                while True:
-                    try:
-                        message = await websocket.recv()
-                        data = json.loads(message)
-                        if data["type"] == "player_event":
-                            player = data["data"]["player"]
-                            if player not in player_data:
-                                player_data[player] = {"market": [], "events": []}
-                            player_data[player]["events"].append(data["data"])
-                            # print(f"Event update for {player}: {data['data']}")
-                            await analyze_and_trade(player)
-                    except websockets.exceptions.ConnectionClosed:
-                        print("Events WebSocket connection closed, reconnecting...")
-                        break
-                    except Exception as e:
-                        print(f"Error in events WebSocket: {e}")
-                        break
-        except Exception as e:
-            print(f"Failed to connect to events WebSocket: {e}")
-        await asyncio.sleep(5)  # Wait before reconnecting
-
-async def analyze_and_trade(player):
-    # Check if there are at least 3 events and market data exists
-    if len(player_data[player]["events"]) >= 3 and len(player_data[player]["market"]) > 0:
-        events = player_data[player]["events"][-3:]  # Get last 3 events
-        market_data = player_data[player]["market"][-1]  # Get latest market data
-
-        # Prepare prompt for Gemini
-        prompt = f"""
-        Analyze these events for {player} and suggest a trading action:
-        Events:
-        {json.dumps(events, indent=2)}
-        Latest Market Data:
-        {json.dumps(market_data, indent=2)}
-        Should we buy, sell, or hold? Provide reasoning and suggest:
-        1. Order type (market or limit)
-        2. Quantity
-        3. If limit order, suggest price
-        """
-
-        # Get Gemini's advice
-        response = model.generate_content(prompt)
-        print(f"\n=== Gemini's Analysis for {player} ===")
-        print(f"📊 Analysis:\n{response.text}")
-        print("=" * 40)
-        # Sleep for 5 seconds after Gemini request
-        await asyncio.sleep(5)
-
-        # Parse Gemini's response and place an order
-        if "buy" in response.text.lower() or "sell" in response.text.lower():
-            order_type = "limit" if "limit" in response.text.lower() else "market"
-            side = "buy" if "buy" in response.text.lower() else "sell"
-            
-            # Extract quantity and price from Gemini's response
-            quantity = 100  # Default quantity
-            price = None  # Default price for market orders
-            
-            # Try to parse quantity and price from response
-            try:
-                # Look for quantity in response (e.g., "buy 200 shares")
-                quantity_match = re.search(r'(\d+)\s*shares', response.text.lower())
-                if quantity_match:
-                    quantity = int(quantity_match.group(1))
-                
-                # Look for price in response (e.g., "at $150.50")
-                price_match = re.search(r'at\s*\$?(\d+\.?\d*)', response.text.lower())
-                if price_match:
-                    price = float(price_match.group(1))
-                elif order_type == "limit":
-                    print("⚠️ No price found in Gemini's response for limit order, using latest market price")
-                    price = market_data["price"]  # Use latest market price as fallback
-            except (ValueError, AttributeError):
-                print("⚠️ Could not parse quantity or price from Gemini's response, using defaults")
-            
-            place_order(player, side, quantity, order_type, price)
-            # Sleep for 5 seconds after placing an order
-            await asyncio.sleep(5)
-
-def place_order(player, side, quantity, order_type="market", price=None):
+def handle_message(record):
+    if isinstance(record, MarketTick):
+        # Add to player-symbol map if not already present
+        if record.player not in player_symbol_map:
+            player_symbol_map[record.player] = record.symbol
+        player_data[record.player].add_market(record.data)
+        scheduler.submit(record.player)
+    elif isinstance(record, PlayerEvent):
+        player_data[record.player].add_event(record.data)
+        scheduler.submit(record.player)
+
+async def generate_analysis(prompt, generation_config=DECISION_CONFIG):
+    """Ask Gemini without blocking the event loop, bounded by LLM_CONCURRENCY and LLM_TIMEOUT"""
+    async with llm_semaphore:
+        return await asyncio.wait_for(
+            model.generate_content_async(prompt, generation_config=generation_config if LLM_JSON_MODE else None),
+            LLM_TIMEOUT
+        )
+
+async def ask_gemini(prompt, label, generation_config=DECISION_CONFIG):
+    """Response text, or None if the request timed out, failed or was blocked"""
+    try:
+        response = await generate_analysis(prompt, generation_config)
+        return response.text  # Raises ValueError when the response was blocked
+    except asyncio.TimeoutError:
+        print(f"⚠️ Gemini analysis for {label} timed out after {LLM_TIMEOUT}s")
+    except Exception as e:
+        print(f"⚠️ Gemini analysis for {label} failed: {e}")
+    return None
+
+def analysis_inputs(player):
+    """Last 3 events and latest market data, or None until the player has both"""
+    history = player_data[player]
+    if len(history.events) >= 3 and history.latest_market is not None:
+        return history.last_events(3), history.latest_market
+    return None
+
+# Malformed decisions are dropped rather than retried; the next trigger for the player asks again
+def reject_decision(player, error):
+    decision_stats["rejected"] += 1
+    print(f"⚠️ Rejected Gemini decision for {player}: {error}")
+
+async def act_on_decision(player, decision):
+    decision_stats["accepted"] += 1
+    print(f"📊 Gemini decision for {player}: {decision}")
+    if decision["action"] == "hold" or decision["confidence"] < MIN_CONFIDENCE:
+        return
+    await place_order(player, decision["action"], decision["quantity"], decision["order_type"],
+                      decision["limit_price"])
+
+async def ask_and_trade(player, inputs, key):
+    """Ask Gemini about one player, cache a valid decision and act on it"""
+    text = await ask_gemini(build_prompt(player, *inputs), player)
+    if text is None:
+        return
+    try:
+        decision = parse_decision(text)
+    except DecisionError as e:
+        reject_decision(player, e)
+        return
+    decision_cache.put(key, decision)
+    await act_on_decision(player, decision)
+
+async def analyze_batch(players):
+    """Analyze several players with one Gemini request and act on each player's decision
+
+    Players whose state matches a cached decision are left out of the request.
+    """
+    inputs, keys = {}, {}
+    for player in players:
+        player_inputs = analysis_inputs(player)
+        if player_inputs is None:
+            continue
+        keys[player] = decision_cache.fingerprint(player, *player_inputs)
+        if decision_cache.get(keys[player]) is None:
+            inputs[player] = player_inputs
+
+    if len(inputs) <= 1:
+        for player, player_inputs in inputs.items():
+            await ask_and_trade(player, player_inputs, keys[player])
+        return
+
+    text = await ask_gemini(build_batch_prompt(inputs), ", ".join(inputs), BATCH_DECISION_CONFIG)
+    if text is None:
+        return
+    try:
+        decisions, errors = parse_batch_decisions(text, list(inputs))
+    except DecisionError as e:
+        for player in inputs:
+            reject_decision(player, e)
+        return
+    for player, error in errors.items():
+        reject_decision(player, error)
+    for player, decision in decisions.items():
+        decision_cache.put(keys[player], decision)
+    await asyncio.gather(*(act_on_decision(player, decision) for player, decision in decisions.items()))
+
+async def place_order(player, side, quantity, order_type="market", price=None):
     order = {
         "symbol": player_symbol_map.get(player, player),  # Use mapped symbol or fallback to player name
         "order_type": order_type,
@@ -141,11 +193,11 @@ def place_order(player, side, quantity, order_type="market", price=None):
         "username": "agent1"
     }
     print(f"📤 Sending order: {order}")  # Debug: Print the order payload
-    response = requests.post(
-        "http://localhost:3030/order",
-        headers={"Content-Type": "application/json"},
-        data=json.dumps(order)
-    )
+    try:
+        response = await order_client.submit(order)
+    except Exception as e:
+        print(f"❌ Failed to place order: {e}")
+        return
     if response.status_code == 201:
         if order_type == "market":
             print(f"✅ Market order placed for {player}: {side} {quantity} shares")
@@ -154,10 +206,39 @@ def place_order(player, side, quantity, order_type="market", price=None):
     else:
         print(f"❌ Failed to place order: {response.text}, {response.status_code}")
 
+# Coalesces ticks and events into at most one pending analysis per player, batched per Gemini request
+scheduler = AnalysisScheduler(
+    analyze_batch,
+    workers=ANALYSIS_WORKERS,
+    debounce=ANALYSIS_DEBOUNCE,
+    max_delay=ANALYSIS_MAX_DELAY,
+    batch_size=ANALYSIS_BATCH_SIZE,
+    batch_wait=ANALYSIS_BATCH_WAIT
+)
+
+feeds = FeedManager(
+    handle_message,
+    stream_uris=STREAM_URIS,
+    multiplex_uri=FEED_MULTIPLEX_URI,
+    subscription=subscription,
+    server_side_filter=FEED_SERVER_FILTER,
+    idle_timeout=FEED_IDLE_TIMEOUT or None
+)
+
+# Seconds between printing decision, cache, scheduler, order and feed metrics (0 disables)
+STATS_INTERVAL = float(os.getenv('STATS_INTERVAL', '60'))
+
+async def report_stats():
+    while STATS_INTERVAL > 0:
+        await asyncio.sleep(STATS_INTERVAL)
+        print(f"📈 Decisions: {decision_stats}, cache: {decision_cache.stats()}")
+        print(f"📈 Scheduler: {scheduler.stats}, orders: {order_client.stats()}, feeds: {feeds.stats}")
+
 async def main():
     await asyncio.gather(
-        market_data_listener(),
-        event_data_listener()
+        feeds.run(),
+        scheduler.run(),
+        report_stats()
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+class AnalysisScheduler:
+    """Coalescing, debounced scheduler that runs at most one analysis per player at a time
+
+    Each player has a single pending slot. Submitting a player that is already
+    pending does not queue another analysis; it only pushes the start back by
+    the debounce window, capped at max_delay after the first submit, so a burst
+    of ticks collapses into one analysis that reads the latest data when it
+    starts. A fixed pool of workers drains players whose window has passed.
+
+    Workers call handler with a list of up to batch_size ready players. When
+    fewer are ready, a worker holds the batch open for up to batch_wait
+    seconds after the oldest became ready, so players that come due shortly
+    after share one analysis.
+    """
+
+    def __init__(self, handler, workers=4, debounce=1.0, max_delay=5.0, batch_size=1, batch_wait=0.0):
+        self.handler = handler
+        self.workers = workers
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.pending = {}  # player -> (ready_at, latest allowed start)
+        self.running = set()
+        self.wakeup = asyncio.Event()
+        self.stats = {"submitted": 0, "coalesced": 0, "batches": 0, "completed": 0, "failed": 0}
+
+    def submit(self, player):
+        """Mark a player as needing analysis"""
+        now = time.monotonic()
+        self.stats["submitted"] += 1
+        if player in self.pending:
+            self.stats["coalesced"] += 1
+            _, cap = self.pending[player]
+            self.pending[player] = (min(now + self.debounce, cap), cap)
+        else:
+            self.pending[player] = (now + self.debounce, now + self.max_delay)
+        self.wakeup.set()
+
+    def next_batch(self, now):
+        """Players to analyze now, or an empty batch and the time to check again
+
+        The time is None when nothing is pending.
+        """
+        waiting = sorted(
+            (ready_at, player) for player, (ready_at, _) in self.pending.items() if player not in self.running
+        )
+        if not waiting:
+            return [], None
+        due = [player for ready_at, player in waiting[:self.batch_size] if ready_at <= now]
+        if not due:
+            return [], waiting[0][0]
+        oldest_ready_at = waiting[0][0]
+        if len(due) == self.batch_size or oldest_ready_at + self.batch_wait <= now:
+            return due, None
+        # Hold the batch open until the wait expires or another player comes due
+        check_at = oldest_ready_at + self.batch_wait
+        if len(waiting) > len(due):
+            check_at = min(check_at, waiting[len(due)][0])
+        return [], check_at
+
+    async def wait_for_wakeup(self, timeout=None):
+        self.wakeup.clear()
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def worker(self):
+        while True:
+            now = time.monotonic()
+            players, check_at = self.next_batch(now)
+            if not players:
+                await self.wait_for_wakeup(None if check_at is None else max(check_at - now, 0))
+                continue
+
+            for player in players:
+                del self.pending[player]
+                self.running.add(player)
+            self.stats["batches"] += 1
+            try:
+                await self.handler(players)
+                self.stats["completed"] += len(players)
+            except Exception as e:
+                self.stats["failed"] += len(players)
+                print(f"Error analyzing {', '.join(map(str, players))}: {e}")
+            finally:
+                self.running.difference_update(players)
+                # A submit that arrived while running can start now
+                self.wakeup.set()
+
+    async def run(self):
+        """Run the worker pool forever"""
+        await asyncio.gather(*(self.worker() for _ in range(self.workers)))
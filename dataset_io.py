@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+
+FORMATS = ['csv', 'parquet', 'arrow']
+EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet', 'arrow': '.arrow'}
+
+# String columns with few distinct values, stored dictionary-encoded in typed formats
+CATEGORICAL_COLUMNS = ['name', 'position', 'symbol', 'event']
+
+# Trading day that "09:30 AM" style clock times are placed on
+SESSION_DATE = '2024-01-01'
+
+def output_filename(stem, fmt='csv'):
+    """File name for a dataset stem in the given format, e.g. stem.parquet"""
+    return stem + EXTENSIONS[fmt]
+
+def parse_times(times, session_date=SESSION_DATE):
+    """Parse "09:30 AM" clock times into datetimes on session_date, once per distinct value"""
+    return _map_unique(
+        pd.Series(times),
+        lambda clock: pd.to_datetime(session_date + ' ' + clock.astype(str), format='%Y-%m-%d %I:%M %p')
+    )
+
+def read_timestamps(df, session_date=SESSION_DATE):
+    """Typed timestamps of a loaded dataset, from its `timestamp` column or its display `time`"""
+    if 'timestamp' in df.columns:
+        return pd.to_datetime(df['timestamp'], format='ISO8601').to_numpy()
+    return parse_times(df['time'], session_date)
+
+def format_times(timestamps, fmt='%I:%M %p'):
+    """Format datetimes for display, formatting each distinct minute only once"""
+    minutes = pd.Series(pd.to_datetime(timestamps)).dt.floor('min')
+    codes, uniques = pd.factorize(minutes)
+    return pd.Categorical.from_codes(codes, pd.DatetimeIndex(uniques).strftime(fmt))
+
+def format_impacts(changes):
+    """Format percentage changes as "+1.23%" strings, one format per distinct value"""
+    codes, uniques = pd.factorize(np.rint(np.asarray(changes, dtype=float) * 100).astype(np.int64))
+    return pd.Categorical.from_codes(codes, [f"{value / 100:+.2f}%" for value in uniques])
+
+def concat_frames(frames):
+    """Concatenate chunk frames, unioning categorical columns instead of falling back to object"""
+    frames = list(frames)
+    combined = pd.concat(frames, ignore_index=True)
+    for column in combined.columns:
+        if all(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames):
+            combined[column] = pd.api.types.union_categoricals([frame[column] for frame in frames])
+    return combined
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet/Arrow output requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+def _map_unique(series, func):
+    """Apply func to the distinct values of a column only and expand the result"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+    return func(pd.Series(uniques)).to_numpy()[codes]
+
+def to_display_frame(df):
+    """Add the "09:30 AM" display time in front of the typed timestamp for CSV output"""
+    if 'timestamp' not in df.columns or 'time' in df.columns:
+        return df
+    display = df.copy()
+    display.insert(display.columns.get_loc('timestamp'), 'time', format_times(display['timestamp']))
+    return display
+
+def to_typed_frame(df, session_date=SESSION_DATE):
+    """Convert display-formatted columns to typed columns for columnar output
+
+    "09:30 AM" times become a `timestamp` datetime column on session_date
+    (unless the frame already carries one), "+2.10%" impacts become floats and
+    low-cardinality strings become categoricals, which pyarrow writes
+    dictionary-encoded.
+    """
+    typed = df.copy()
+    if 'time' in typed.columns:
+        if 'timestamp' not in typed.columns:
+            typed.insert(typed.columns.get_loc('time'), 'timestamp', parse_times(typed['time'], session_date))
+        typed = typed.drop(columns='time')
+    if 'timestamp' in typed.columns:
+        typed['timestamp'] = typed['timestamp'].astype('datetime64[us]')
+    if 'impact' in typed.columns and not pd.api.types.is_float_dtype(typed['impact']):
+        typed['impact'] = _map_unique(
+            typed['impact'],
+            lambda impacts: impacts.astype(str).str.rstrip('%').astype(float)
+        )
+    for column in CATEGORICAL_COLUMNS:
+        if column in typed.columns and not isinstance(typed[column].dtype, pd.CategoricalDtype):
+            typed[column] = typed[column].astype('category')
+    return typed
+
+def _to_table(df, schema=None):
+    pa = _import_pyarrow()
+    table = pa.Table.from_pandas(to_typed_frame(df), preserve_index=False)
+    if schema is None:
+        # Use the same dictionary index width for every chunk of a stream
+        schema = pa.schema([
+            pa.field(field.name, pa.dictionary(pa.int32(), field.type.value_type))
+            if pa.types.is_dictionary(field.type) else field
+            for field in table.schema
+        ])
+    return table.cast(schema)
+
+def write_dataset(df, filename, fmt='csv'):
+    """Write a frame as CSV, or as typed Parquet / Arrow IPC with pyarrow"""
+    if fmt == 'csv':
+        to_display_frame(df).to_csv(filename, index=False)
+    elif fmt == 'parquet':
+        _import_pyarrow().parquet.write_table(_to_table(df), filename)
+    elif fmt == 'arrow':
+        pa = _import_pyarrow()
+        table = _to_table(df)
+        with pa.ipc.new_file(filename, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError(f"Unknown output format: {fmt}")
+
+def write_csv_stream(chunks, filename):
+    """Write an iterable of DataFrames to one CSV file, appending chunk by chunk
+
+    The header is taken from the first chunk. Returns the number of rows written.
+    """
+    rows = 0
+    with open(filename, 'w', newline='') as f:
+        for i, chunk in enumerate(chunks):
+            to_display_frame(chunk).to_csv(f, header=(i == 0), index=False)
+            rows += len(chunk)
+    return rows
+
+def write_parquet_stream(chunks, filename):
+    """Write an iterable of DataFrames to one Parquet file, one row group per chunk
+
+    Returns the number of rows written.
+    """
+    pq = _import_pyarrow().parquet
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = _to_table(chunk, writer.schema if writer else None)
+            if writer is None:
+                writer = pq.ParquetWriter(filename, table.schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+def write_arrow_stream(chunks, filename):
+    """Write an iterable of DataFrames to one Arrow IPC file, one record batch per chunk
+
+    IPC files hold a single dictionary per field that can only be extended,
+    so each chunk's categoricals are encoded against the categories of all
+    earlier chunks, with new ones appended and written as dictionary deltas.
+    Returns the number of rows written.
+    """
+    pa = _import_pyarrow()
+    options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+    categories = {}
+    rows = 0
+    writer = schema = None
+    try:
+        for chunk in chunks:
+            typed = to_typed_frame(chunk)
+            for column in CATEGORICAL_COLUMNS:
+                if column in typed.columns:
+                    known = categories.get(column, pd.Index([]))
+                    categories[column] = known.append(typed[column].cat.categories.difference(known, sort=False))
+                    typed[column] = typed[column].cat.set_categories(categories[column])
+            table = _to_table(typed, schema)
+            if writer is None:
+                schema = table.schema
+                writer = pa.ipc.new_file(filename, schema, options=options)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+STREAM_WRITERS = {'csv': write_csv_stream, 'parquet': write_parquet_stream, 'arrow': write_arrow_stream}
+
+def write_stream(chunks, filename, fmt='csv'):
+    """Write chunks incrementally in any of FORMATS"""
+    if fmt not in STREAM_WRITERS:
+        raise ValueError(f"Unknown output format: {fmt}")
+    return STREAM_WRITERS[fmt](chunks, filename)
@@ -0,0 +1,55 @@
+import json
+import math
+from cachetools import TTLCache
+
+class DecisionCache:
+    """Trading decisions memoized on a normalized fingerprint of the player's state
+
+    The fingerprint is the player, their recent events and the latest price
+    bucketed on a log scale, so ticks that move the price by less than
+    price_bucket (a fraction, 0.01 = 1%) map to the same key. Entries expire
+    after ttl seconds and the least recently used are evicted past maxsize.
+    A maxsize of 0 disables caching: every lookup is a miss.
+    """
+
+    def __init__(self, maxsize=4096, ttl=300.0, price_bucket=0.01):
+        if maxsize < 0:
+            raise ValueError(f"maxsize must be >= 0, got {maxsize}")
+        self.enabled = maxsize > 0
+        self.cache = TTLCache(maxsize=max(maxsize, 1), ttl=ttl)
+        self.price_bucket = price_bucket
+        self.hits = 0
+        self.misses = 0
+
+    def bucket(self, price):
+        if price is None:
+            return None
+        price = float(price)
+        if price <= 0 or not self.price_bucket:
+            return price
+        return math.floor(math.log(price) / math.log1p(self.price_bucket))
+
+    def fingerprint(self, player, events, market_data):
+        events_key = json.dumps(events, sort_keys=True, separators=(",", ":"), default=str)
+        return player, events_key, self.bucket(market_data.get("price"))
+
+    def get(self, key):
+        decision = self.cache.get(key)
+        if decision is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return decision
+
+    def put(self, key, decision):
+        if self.enabled:
+            self.cache[key] = decision
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.cache)
+        }
@@ -1,94 +1,95 @@
 import pandas as pd
 import numpy as np
+import argparse
 from datetime import datetime, timedelta
+from dataset_io import FORMATS, output_filename, write_dataset, read_timestamps, format_impacts
+from generation_utils import generate_symbol, repeat_per_player
 
-def generate_symbol(name, position):
-    """Generate a stock symbol for a player"""
-    # Take first letter of first name and up to 3 letters of last name
-    parts = name.split()
-    if len(parts) >= 2:
-        symbol = (parts[0][0] + parts[-1][:3]).upper()
-    else:
-        symbol = name[:4].upper()
-    
-    # Add position identifier without dot (e.g., JDOEP for a pitcher)
-    symbol += position
-    
-    return symbol
+def extrapolate_data(df, points_per_player=100):
+    """Extrapolate intraday data to points_per_player points per player
 
-def extrapolate_data(df):
-    """Extrapolate intraday data to 100 points per player"""
-    # Convert time strings to datetime for interpolation
-    df['datetime'] = pd.to_datetime(df['time'].apply(lambda x: f"2024-01-01 {x}"))
-    
-    # Create new dataframe for extrapolated data
-    extrapolated_data = []
-    
-    # Get unique players
-    players = df[['player_id', 'name', 'position']].drop_duplicates()
-    
-    for _, player in players.iterrows():
-        player_id = player['player_id']
-        player_data = df[df['player_id'] == player_id].copy()
-        
-        if len(player_data) == 0:
-            continue
-            
-        # Generate symbol for player
-        symbol = generate_symbol(player['name'], player['position'])
-        
-        # Sort by time
-        player_data = player_data.sort_values('datetime')
-        
-        # Create 100 evenly spaced timestamps between first and last event
-        start_time = player_data['datetime'].min()
-        end_time = player_data['datetime'].max()
-        
-        new_times = pd.date_range(start=start_time, end=end_time, periods=100)
-        
-        # Interpolate prices
-        price_interpolator = np.interp(
-            new_times.astype(np.int64), 
-            player_data['datetime'].astype(np.int64),
-            player_data['price']
-        )
-        
-        # Generate events and impacts for interpolated points
-        for i, (timestamp, price) in enumerate(zip(new_times, price_interpolator)):
-            # Find nearest real event
-            nearest_idx = abs(player_data['datetime'] - timestamp).argmin()
-            nearest_event = player_data.iloc[nearest_idx]
-            
-            # Calculate price change
-            prev_price = price_interpolator[i-1] if i > 0 else price
-            price_change = ((price - prev_price) / prev_price) * 100 if i > 0 else 0
-            
-            extrapolated_data.append({
-                'player_id': player_id,
-                'name': player['name'],
-                'position': player['position'],
-                'symbol': symbol,
-                'time': timestamp.strftime('%I:%M %p'),
-                'price': round(price, 2),
-                'event': nearest_event['event'],
-                'impact': f"{price_change:+.2f}%"
-            })
-    
-    # Create new dataframe and sort by time for each player
-    new_df = pd.DataFrame(extrapolated_data)
-    new_df = new_df.sort_values(['player_id', 'time'])
+    All players are handled in one pass: the input is sorted once by player and
+    time, prices are interpolated with a single np.interp over per-player time
+    offsets and nearest events are found with np.searchsorted.
+    """
+    # Typed timestamps for interpolation, from the timestamp column or parsed display times
+    data = pd.DataFrame({
+        'player_id': df['player_id'].to_numpy(),
+        'datetime': read_timestamps(df),
+        'price': df['price'].to_numpy(dtype=float),
+        'event': df['event'].to_numpy()
+    }).sort_values(['player_id', 'datetime'], kind='stable', ignore_index=True)
+    
+    # Player boundaries in the sorted data
+    player_ids, starts, counts = np.unique(data['player_id'].to_numpy(), return_index=True, return_counts=True)
+    ends = starts + counts - 1
+    num_players = len(player_ids)
+    
+    players = df[['player_id', 'name', 'position']].drop_duplicates('player_id').set_index('player_id').loc[player_ids]
+    symbols = [generate_symbol(name, position) for name, position in zip(players['name'], players['position'])]
+    
+    # Seconds since the first event of the day; each player is shifted into its own
+    # disjoint range so a single interp/searchsorted call serves every player
+    times = data['datetime'].to_numpy()
+    day_start = times.min()
+    seconds = (times - day_start) / np.timedelta64(1, 's')
+    spacing = seconds.max() + 1
+    player_index = np.repeat(np.arange(num_players), counts)
+    keys = seconds + player_index * spacing
+    
+    # Evenly spaced timestamps between each player's first and last event
+    first, last = seconds[starts], seconds[ends]
+    steps = np.linspace(0, 1, points_per_player)
+    new_seconds = first[:, None] + (last - first)[:, None] * steps[None, :]
+    new_keys = (new_seconds + np.arange(num_players)[:, None] * spacing).ravel()
+    
+    # Interpolate prices
+    prices = np.interp(new_keys, keys, data['price'].to_numpy()).reshape(num_players, points_per_player)
+    
+    # Find nearest real event: the closer of the neighbours on either side,
+    # preferring the earlier one on ties
+    right = np.searchsorted(keys, new_keys, side='left')
+    left = np.maximum(right - 1, 0)
+    right = np.minimum(right, len(keys) - 1)
+    use_left = (new_keys - keys[left]) <= (keys[right] - new_keys)
+    nearest = np.where(use_left, np.searchsorted(keys, keys[left], side='left'), right)
+    
+    # Calculate price change from the previous interpolated point
+    price_changes = np.zeros_like(prices)
+    price_changes[:, 1:] = (prices[:, 1:] - prices[:, :-1]) / prices[:, :-1] * 100
+    
+    timestamps = (day_start + (new_seconds.ravel() * 1e9).astype('timedelta64[ns]')).astype('datetime64[us]')
+    
+    event_codes, events = pd.factorize(data['event'])
+    
+    # Rows come out ordered by player_id and time; repeated strings are categoricals
+    new_df = pd.DataFrame({
+        'player_id': np.repeat(player_ids, points_per_player),
+        'name': repeat_per_player(players['name'], points_per_player),
+        'position': repeat_per_player(players['position'], points_per_player),
+        'symbol': repeat_per_player(symbols, points_per_player),
+        'timestamp': timestamps,
+        'price': np.round(prices.ravel(), 2),
+        'event': pd.Categorical.from_codes(event_codes[nearest], events),
+        'impact': format_impacts(price_changes.ravel())
+    })
     
     return new_df
 
 def main():
+    parser = argparse.ArgumentParser(description="Extrapolate intraday data to more points per player")
+    parser.add_argument('--points-per-player', type=int, default=100, help="Number of points per player")
+    parser.add_argument('--format', choices=FORMATS, default='csv', help="Output file format")
+    args = parser.parse_args()
+    
     # Read original data
     df = pd.read_csv('player_intraday_data.csv')
     
     # Extrapolate data
-    extrapolated_df = extrapolate_data(df)
+    extrapolated_df = extrapolate_data(df, args.points_per_player)
     
-    # Save to new CSV
-    extrapolated_df.to_csv('player_intraday_data_extrapolated.csv', index=False)
+    # Save to new file
+    write_dataset(extrapolated_df, output_filename('player_intraday_data_extrapolated', args.format), args.format)
     
     # Print sample of data
     print("\nSample of extrapolated data:")
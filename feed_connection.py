@@ -0,0 +1,264 @@
+import asyncio
+import inspect
+import json
+import random
+import websockets
+from datetime import datetime
+from feed_decoding import FeedDecoder
+
+FEED_URI = "ws://localhost:3030/ws"
+STREAM_URIS = {
+    "market": "ws://localhost:3030/ws/market",
+    "events": "ws://localhost:3030/ws/events"
+}
+
+def sort_key(timestamp):
+    """Timestamp in a form that orders chronologically where possible
+
+    Numbers and ISO 8601 strings are compared as instants; any other string
+    falls back to text order.
+    """
+    if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+        return (0, float(timestamp))
+    if isinstance(timestamp, str):
+        try:
+            return (0, datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp())
+        except ValueError:
+            pass
+    return (1, str(timestamp))
+
+class ResumePoint:
+    """Where each feed left off, used to resume after a reconnect and drop the replayed overlap
+
+    Messages with a `seq` are deduplicated by sequence number per message type.
+    Messages without one are only checked while the server replays after a
+    resume: until a player's feed catches up, a message for that (type,
+    player) at or before the last timestamp handled for it is dropped if it
+    was already seen. Live messages are never dropped by timestamp, since
+    ticks for different players interleave out of order.
+    """
+
+    def __init__(self):
+        self.seq = {}
+        self.last_timestamp = {}  # type -> timestamp of the latest message handled
+        self.timestamp = {}  # (type, player) -> timestamp of the latest message handled
+        self.at_timestamp = {}  # (type, player) -> raw messages seen at that timestamp
+        self.replaying = set()  # (type, player) keys not yet caught up since the last resume
+
+    @staticmethod
+    def key(record):
+        player = getattr(record, "player", None)
+        return record.TYPE, player if player is not None else getattr(record, "player_id", None)
+
+    def start_replay(self):
+        """Called after sending a resume request: check the next messages against the timestamps seen"""
+        self.replaying = set(self.timestamp)
+
+    def is_duplicate(self, record, raw):
+        msg_type, seq, timestamp = record.TYPE, record.seq, record.timestamp
+        if seq is not None:
+            return msg_type in self.seq and seq <= self.seq[msg_type]
+        key = self.key(record)
+        if timestamp is None or key not in self.replaying:
+            return False
+        last = sort_key(self.timestamp[key])
+        if sort_key(timestamp) < last:
+            return True
+        if sort_key(timestamp) == last and raw in self.at_timestamp[key]:
+            return True
+        # The first new message for this player ends its replay
+        self.replaying.discard(key)
+        return False
+
+    def advance(self, record, raw):
+        msg_type, seq, timestamp = record.TYPE, record.seq, record.timestamp
+        if seq is not None:
+            self.seq[msg_type] = seq
+        if timestamp is None:
+            return
+        self.last_timestamp[msg_type] = timestamp
+        key = self.key(record)
+        if timestamp != self.timestamp.get(key):
+            self.timestamp[key] = timestamp
+            self.at_timestamp[key] = set()
+        self.at_timestamp[key].add(raw)
+
+    def resume_message(self):
+        """Resume request for the server, or None before anything was received"""
+        if not self.seq and not self.last_timestamp:
+            return None
+        return {"type": "resume", "last_seq": self.seq, "last_timestamp": self.last_timestamp}
+
+class FeedConnection:
+    """One WebSocket connection that reconnects with jittered exponential backoff
+
+    Liveness is checked with protocol pings, and optionally by reconnecting
+    when no message arrives within idle_timeout. After every reconnect the
+    shared resume point is sent so the server can replay the gap, and
+    duplicates from the replay are dropped before reaching on_message.
+    Messages are decoded into records by the decoder, and on_message is
+    called only for the records it keeps that match the subscription. With
+    server_side_filter the subscription is also sent to the server on every
+    connect, for servers that support filtering.
+    """
+
+    def __init__(self, uri, on_message, resume=None, decoder=None, subscription=None, server_side_filter=False,
+                 initial_backoff=0.5, max_backoff=30.0, ping_interval=20.0, ping_timeout=20.0, open_timeout=10.0,
+                 idle_timeout=None):
+        self.uri = uri
+        self.on_message = on_message
+        self.resume = resume if resume is not None else ResumePoint()
+        self.decoder = decoder if decoder is not None else FeedDecoder()
+        # Only a decoder built here follows the subscription; a caller-supplied one keeps its own prefilter
+        self.owns_decoder = decoder is None
+        self.subscription = subscription
+        self.server_side_filter = server_side_filter
+        self.websocket = None
+        if subscription is not None and self.owns_decoder:
+            self.decoder.set_prefilter(subscription.prefilter())
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.open_timeout = open_timeout
+        self.idle_timeout = idle_timeout
+        self.stats = {"connects": 0, "messages": 0, "duplicates": 0, "filtered": 0, "invalid": 0}
+
+    async def subscribe(self, subscription):
+        """Replace the subscription, telling the server if connected and filtering server-side"""
+        self.subscription = subscription
+        if self.owns_decoder:
+            self.decoder.set_prefilter(subscription.prefilter())
+        if self.server_side_filter and self.websocket is not None:
+            await self.websocket.send(json.dumps(subscription.message()))
+
+    async def dispatch(self, raw):
+        # A malformed message is counted and skipped; it must never stop the connection
+        try:
+            record = self.decoder.decode(raw)
+            if record is None:
+                return
+            if self.subscription is not None and not self.subscription.matches(record):
+                self.stats["filtered"] += 1
+                return
+            if self.resume.is_duplicate(record, raw):
+                self.stats["duplicates"] += 1
+                return
+            self.resume.advance(record, raw)
+        except (ValueError, TypeError) as e:
+            self.stats["invalid"] += 1
+            print(f"Invalid message from {self.uri}: {e}")
+            return
+        self.stats["messages"] += 1
+        try:
+            result = self.on_message(record)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            print(f"Error handling message from {self.uri}: {e}")
+
+    async def run(self, stop_if_rejected=False):
+        """Keep the connection open forever
+
+        With stop_if_rejected, returns False if the server rejects the
+        handshake before any successful connection, so the caller can fall
+        back to another endpoint.
+        """
+        backoff = self.initial_backoff
+        while True:
+            try:
+                async with websockets.connect(
+                    self.uri,
+                    ping_interval=self.ping_interval,
+                    ping_timeout=self.ping_timeout,
+                    open_timeout=self.open_timeout
+                ) as websocket:
+                    print(f"Connected to {self.uri}")
+                    self.stats["connects"] += 1
+                    self.websocket = websocket
+                    if self.server_side_filter and self.subscription:
+                        await websocket.send(json.dumps(self.subscription.message()))
+                    resume = self.resume.resume_message()
+                    if resume:
+                        await websocket.send(json.dumps(resume))
+                        self.resume.start_replay()
+                    while True:
+                        try:
+                            raw = await asyncio.wait_for(websocket.recv(), self.idle_timeout)
+                        except asyncio.TimeoutError:
+                            print(f"No message from {self.uri} in {self.idle_timeout}s, reconnecting...")
+                            break
+                        # Only reset the backoff once the connection has delivered data
+                        backoff = self.initial_backoff
+                        await self.dispatch(raw)
+            except websockets.exceptions.ConnectionClosed:
+                print(f"Connection to {self.uri} closed, reconnecting...")
+            except websockets.exceptions.InvalidStatus as e:
+                if stop_if_rejected and not self.stats["connects"]:
+                    print(f"{self.uri} rejected the connection: {e}")
+                    return False
+                print(f"Failed to connect to {self.uri}: {e}")
+            except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+                print(f"Failed to connect to {self.uri}: {e}")
+
+            self.websocket = None
+            # Full jitter keeps reconnecting clients from dialling in lockstep
+            await asyncio.sleep(random.uniform(0, backoff))
+            backoff = min(backoff * 2, self.max_backoff)
+
+class FeedManager:
+    """Runs several feeds over one multiplexed connection, or one connection per stream
+
+    When multiplex_uri is set it is tried first; if the server rejects it the
+    manager falls back to the per-stream URIs. Either way every connection
+    shares the same dial, backoff and health-check logic, and one resume point
+    per message type, so nothing is replayed twice after switching.
+    """
+
+    def __init__(self, on_message, stream_uris=STREAM_URIS, multiplex_uri=None, decoder=None, subscription=None,
+                 server_side_filter=False, **options):
+        self.on_message = on_message
+        self.decoder = decoder if decoder is not None else FeedDecoder()
+        self.owns_decoder = decoder is None
+        self.subscription = subscription
+        self.server_side_filter = server_side_filter
+        if subscription is not None and self.owns_decoder:
+            self.decoder.set_prefilter(subscription.prefilter())
+        self.stream_uris = stream_uris
+        self.multiplex_uri = multiplex_uri
+        self.options = options
+        self.resume = ResumePoint()
+        self.connections = []
+
+    def connection(self, uri):
+        connection = FeedConnection(uri, self.on_message, self.resume, self.decoder, self.subscription,
+                                    self.server_side_filter, **self.options)
+        self.connections.append(connection)
+        return connection
+
+    @property
+    def stats(self):
+        totals = {"connects": 0, "messages": 0, "duplicates": 0, "filtered": 0, "invalid": 0}
+        for connection in self.connections:
+            for key, value in connection.stats.items():
+                totals[key] += value
+        return totals
+
+    async def subscribe(self, subscription):
+        """Replace the subscription of the manager and every open connection
+
+        The shared decoder's prefilter is updated here, so a subscription made
+        before run() applies to the connections it creates later.
+        """
+        self.subscription = subscription
+        if self.owns_decoder:
+            self.decoder.set_prefilter(subscription.prefilter())
+        for connection in self.connections:
+            await connection.subscribe(subscription)
+
+    async def run(self):
+        if self.multiplex_uri:
+            stop_if_rejected = bool(self.stream_uris)
+            if await self.connection(self.multiplex_uri).run(stop_if_rejected) is False:
+                print("Falling back to one connection per stream")
+        await asyncio.gather(*(self.connection(uri).run() for uri in self.stream_uris.values()))
@@ -0,0 +1,122 @@
+import json
+from dataclasses import dataclass
+from typing import ClassVar
+
+# orjson is optional; it decodes feed messages several times faster than the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson else "json"
+loads = orjson.loads if orjson else json.loads
+
+def message_fields(message):
+    """The data payload, sequence number and timestamp of a feed message"""
+    data = message.get("data") or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"data is a {type(data).__name__}, expected an object")
+    return data, message.get("seq"), data.get("timestamp", message.get("timestamp"))
+
+@dataclass(slots=True)
+class MarketTick:
+    TYPE: ClassVar[str] = "market_data"
+    player: str
+    symbol: str
+    price: float
+    timestamp: object
+    seq: object
+    data: dict
+
+    @classmethod
+    def from_message(cls, message):
+        data, seq, timestamp = message_fields(message)
+        price = data.get("price")
+        return cls(data.get("player"), data.get("symbol"), None if price is None else float(price), timestamp, seq, data)
+
+@dataclass(slots=True)
+class PlayerEvent:
+    TYPE: ClassVar[str] = "player_event"
+    player: str
+    event_type: str
+    description: str
+    timestamp: object
+    seq: object
+    data: dict
+
+    @classmethod
+    def from_message(cls, message):
+        data, seq, timestamp = message_fields(message)
+        return cls(data.get("player"), data.get("event_type"), data.get("description"), timestamp, seq, data)
+
+@dataclass(slots=True)
+class NewsEvent:
+    TYPE: ClassVar[str] = "news_event"
+    player_id: int
+    event_type: str
+    description: str
+    timestamp: object
+    seq: object
+    data: dict
+
+    @classmethod
+    def from_message(cls, message):
+        data, seq, timestamp = message_fields(message)
+        return cls(data.get("player_id"), data.get("event_type"), data.get("description"), timestamp, seq, data)
+
+RECORD_TYPES = {record.TYPE: record for record in (MarketTick, PlayerEvent, NewsEvent)}
+
+def json_needles(value):
+    """Forms a string value can take inside raw JSON text, with and without escaping"""
+    escaped = json.dumps(str(value))[1:-1]
+    unescaped = json.dumps(str(value), ensure_ascii=False)[1:-1]
+    return {escaped, unescaped}
+
+class FeedDecoder:
+    """Decodes raw feed messages into slotted records
+
+    With a prefilter (an iterable of strings, e.g. player names or symbols),
+    messages whose raw text contains none of them are skipped before they are
+    parsed. This is only a cheap first pass: a match may still be in another
+    field, so consumers do their exact checks on the decoded record.
+    """
+
+    def __init__(self, record_types=RECORD_TYPES, prefilter=None):
+        self.record_types = record_types
+        self.set_prefilter(prefilter)
+        self.stats = {"decoded": 0, "filtered": 0, "unknown": 0}
+
+    def set_prefilter(self, prefilter):
+        needles = set()
+        for value in prefilter or ():
+            needles |= json_needles(value)
+        self.needles = sorted(needles)
+        self.byte_needles = [needle.encode() for needle in self.needles]
+
+    def accepts(self, raw):
+        """Whether the raw message passes the prefilter"""
+        if not self.needles:
+            return True
+        needles = self.byte_needles if isinstance(raw, bytes) else self.needles
+        return any(needle in raw for needle in needles)
+
+    def decode(self, raw):
+        """Record for a raw message, or None if it is filtered out or of an unknown type
+
+        Raises ValueError for malformed JSON and for payloads with fields of
+        the wrong type.
+        """
+        if not self.accepts(raw):
+            self.stats["filtered"] += 1
+            return None
+        message = loads(raw)
+        record_type = self.record_types.get(message.get("type")) if isinstance(message, dict) else None
+        if record_type is None:
+            self.stats["unknown"] += 1
+            return None
+        try:
+            record = record_type.from_message(message)
+        except (TypeError, AttributeError) as e:
+            raise ValueError(f"malformed {record_type.TYPE} message: {e}") from None
+        self.stats["decoded"] += 1
+        return record
@@ -0,0 +1,97 @@
+import json
+from generation_utils import generate_symbol
+
+def load_roster(filename="players_data.json"):
+    """Player records (id, fullName, position) used to resolve IDs and positions to names"""
+    with open(filename) as f:
+        return json.load(f)
+
+def parse_list(value):
+    """Comma-separated values from an environment variable or option, ignoring blanks"""
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+def record_field(record, name):
+    """A field of a decoded record, falling back to its raw payload"""
+    value = getattr(record, name, None)
+    return record.data.get(name) if value is None else value
+
+class Subscription:
+    """Symbols, player names, player IDs and positions a client wants to receive
+
+    An empty subscription matches everything. Matching is a set lookup on the
+    decoded record's keys, and a record matches if any one of them is
+    watched. Symbols, player IDs and positions can be resolved to names with
+    a roster, which lets the raw prefilter skip unwatched messages before
+    decoding. Player events carry a name but no symbol, so without a roster
+    the player behind each watched symbol is learned from its market ticks
+    and their events match from then on.
+    """
+
+    def __init__(self, symbols=(), players=(), player_ids=(), positions=(), resolved=False):
+        self.symbols = frozenset(symbols)
+        self.players = frozenset(players)
+        self.player_ids = frozenset(int(player_id) for player_id in player_ids)
+        self.positions = frozenset(positions)
+        self.resolved = resolved
+        self.learned_players = set()  # Players seen on ticks for watched symbols
+
+    def __bool__(self):
+        return bool(self.symbols or self.players or self.player_ids or self.positions)
+
+    def __repr__(self):
+        return (f"Subscription(symbols={sorted(self.symbols)}, players={sorted(self.players)}, "
+                f"player_ids={sorted(self.player_ids)}, positions={sorted(self.positions)})")
+
+    def with_roster(self, roster):
+        """Copy with the players matching the watched symbols, IDs and positions added by name
+
+        Symbols are matched with generate_symbol. If any watched symbol is not
+        found in the roster the copy stays unresolved, so its ticks are still
+        decoded and the player behind it can be learned.
+        """
+        players = set(self.players)
+        player_ids = set(self.player_ids)
+        found_symbols = set()
+        for player in roster:
+            symbol = generate_symbol(player["fullName"], player.get("position") or "") if self.symbols else None
+            if player.get("id") in self.player_ids or player.get("position") in self.positions or symbol in self.symbols:
+                players.add(player["fullName"])
+                player_ids.add(player["id"])
+                found_symbols.add(symbol)
+        resolved = self.symbols <= found_symbols
+        return Subscription(self.symbols, players, player_ids, self.positions, resolved=resolved)
+
+    def matches(self, record):
+        if not self:
+            return True
+        player = record_field(record, "player")
+        if record_field(record, "symbol") in self.symbols:
+            if player is not None:
+                self.learned_players.add(player)
+            return True
+        return (
+            player in self.players
+            or player in self.learned_players
+            or record_field(record, "player_id") in self.player_ids
+            or record_field(record, "position") in self.positions
+        )
+
+    def prefilter(self):
+        """Strings one of which every matching message contains, or None if there is no such set
+
+        Unresolved symbols and positions can only be checked after decoding,
+        so they disable the prefilter.
+        """
+        if not self or ((self.symbols or self.positions) and not self.resolved):
+            return None
+        return sorted(self.symbols | self.players | {str(player_id) for player_id in self.player_ids})
+
+    def message(self):
+        """Subscribe request asking the server to send only the watched messages"""
+        return {
+            "type": "subscribe",
+            "symbols": sorted(self.symbols),
+            "players": sorted(self.players),
+            "player_ids": sorted(self.player_ids),
+            "positions": sorted(self.positions)
+        }
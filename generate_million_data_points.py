@@ -1,95 +1,212 @@
 import pandas as pd
 import numpy as np
+import argparse
+import os
 from datetime import datetime, timedelta
-import random
-
-def generate_symbol(name, position):
-    """Generate a stock symbol for a player"""
-    parts = name.split()
-    if len(parts) >= 2:
-        symbol = (parts[0][0] + parts[-1][:3]).upper()
-    else:
-        symbol = name[:4].upper()
-    symbol += position
-    return symbol
-
-def generate_random_data(df, num_points=1000000):
-    """Generate randomized intraday data with ±5% movements"""
-    # Get unique players
-    players = df[['player_id', 'name', 'position']].drop_duplicates()
+from functools import partial
+from generation_utils import (
+    resolve_seed, player_rng, generate_symbol, repeat_per_player, split_into_chunks, map_chunks, imap_chunks
+)
+from dataset_io import FORMATS, SESSION_DATE, output_filename, write_dataset, write_stream
+
+EVENTS = [
+    "Trade activity",
+    "Market movement",
+    "Player performance update",
+    "Team news",
+    "League announcement"
+]
+
+# Lookup table for impact strings, indexed by the change in hundredths of a percent
+IMPACT_OFFSET = 1000
+IMPACT_LABELS = [f"{i / 100:+.2f}%" for i in range(-IMPACT_OFFSET, IMPACT_OFFSET + 1)]
+
+def simulate_price_path(base_price, draws, block_size=256):
+    """Simulate a mean-reverting random walk from uniform draws in [0, 1)
+
+    Every band spans 10 percentage points, so a draw maps to a change of
+    band_low + 10 * draw: -2..8 below 20% of base, -8..2 above 200% of base
+    and -5..5 otherwise. The path is built in blocks with a cumulative
+    product and only restarts where the band changes or the 10% floor is hit.
+    """
+    num_steps = len(draws)
+    prices = np.empty(num_steps)
+    changes = np.empty(num_steps)
+    low_band = base_price * 0.2
+    high_band = base_price * 2
+    min_price = base_price * 0.1
+
+    current_price = base_price
+    pos = 0
+    while pos < num_steps:
+        end = min(num_steps, pos + block_size)
+        if current_price < low_band:
+            band_low = -2.0
+        elif current_price > high_band:
+            band_low = -8.0
+        else:
+            band_low = -5.0
+
+        block_changes = band_low + draws[pos:end] * 10.0
+        factors = np.empty(end - pos + 1)
+        factors[0] = current_price
+        factors[1:] = 1 + block_changes / 100
+        path = np.multiply.accumulate(factors)
+
+        # Price before each step decides its band; stop at the first step whose
+        # band differs from the assumed one or that would fall through the floor
+        previous = path[:-1]
+        if band_low == -2.0:
+            in_band = previous < low_band
+        elif band_low == -8.0:
+            in_band = previous > high_band
+        else:
+            in_band = (previous >= low_band) & (previous <= high_band)
+        valid = in_band & (path[1:] >= min_price)
+        accepted = len(valid) if valid.all() else int(np.argmin(valid))
+
+        prices[pos:pos + accepted] = path[1:accepted + 1]
+        changes[pos:pos + accepted] = block_changes[:accepted]
+        pos += accepted
+        if accepted:
+            current_price = prices[pos - 1]
+
+        if accepted < len(valid) and in_band[accepted]:
+            # Same band but below the floor: clamp this step and carry on
+            change = block_changes[accepted]
+            current_price = max(min_price, current_price * (1 + change / 100))
+            prices[pos] = current_price
+            changes[pos] = change
+            pos += 1
+
+    return prices, changes
+
+def simulate_players(players_chunk, points_per_player, seed):
+    """Simulate prices, changes and event codes for (player_id, base_price) pairs
+
+    Each player draws from its own generator seeded by (seed, player_id), so the
+    result does not depend on how players are split across workers.
+    """
+    prices = np.empty((len(players_chunk), points_per_player))
+    changes = np.empty((len(players_chunk), points_per_player))
+    event_codes = np.empty((len(players_chunk), points_per_player), dtype=np.int64)
+    
+    for idx, (player_id, base_price) in enumerate(players_chunk):
+        rng = player_rng(seed, player_id)
+        prices[idx], changes[idx] = simulate_price_path(base_price, rng.random(points_per_player))
+        event_codes[idx] = rng.integers(0, len(EVENTS), points_per_player)
+    
+    return prices, changes, event_codes
+
+def prepare_players(df):
+    """Unique players ordered by player_id, with their mean price as base price"""
+    players = df[['player_id', 'name', 'position']].drop_duplicates('player_id')
+    players = players.sort_values('player_id').reset_index(drop=True)
+    players['base_price'] = df.groupby('player_id')['price'].mean().reindex(players['player_id']).to_numpy()
+    players['symbol'] = [generate_symbol(name, position) for name, position in zip(players['name'], players['position'])]
+    return players
+
+def session_times(points_per_player):
+    """Evenly spaced timestamps from 09:30 AM to 04:00 PM with microsecond resolution"""
+    start_time = datetime.strptime(f"{SESSION_DATE} 09:30 AM", "%Y-%m-%d %I:%M %p")
+    end_time = datetime.strptime(f"{SESSION_DATE} 04:00 PM", "%Y-%m-%d %I:%M %p")
+    time_delta = (end_time - start_time) / points_per_player
+    step_us = time_delta // timedelta(microseconds=1)
+    return np.datetime64(start_time, 'us') + np.arange(points_per_player) * np.timedelta64(step_us, 'us')
+
+def build_frame(players, prices, changes, event_codes, times):
+    """Assemble simulated arrays for a block of players into a columnar frame"""
+    points_per_player = prices.shape[1]
+    
+    # Rows are produced player by player in time order, so no sort is needed.
+    # Repeated strings are stored as categoricals instead of a million Python objects.
+    impact_codes = np.clip(np.rint(changes.ravel() * 100).astype(np.int64), -IMPACT_OFFSET, IMPACT_OFFSET)
+    return pd.DataFrame({
+        'player_id': np.repeat(players['player_id'].to_numpy(), points_per_player),
+        'name': repeat_per_player(players['name'], points_per_player),
+        'position': repeat_per_player(players['position'], points_per_player),
+        'symbol': repeat_per_player(players['symbol'], points_per_player),
+        'timestamp': np.tile(times, len(players)),
+        'price': np.round(prices.ravel(), 2),
+        'event': pd.Categorical.from_codes(event_codes.ravel(), EVENTS),
+        'impact': pd.Categorical.from_codes(impact_codes + IMPACT_OFFSET, IMPACT_LABELS)
+    })
+
+def generate_random_data(df, num_points=1000000, seed=None, workers=1):
+    """Generate randomized intraday data with ±5% movements
+
+    The same seed gives bit-identical output for any number of workers.
+    """
+    players = prepare_players(df)
     
     # Calculate number of points per player
     points_per_player = num_points // len(players)
+    times = session_times(points_per_player)
     
-    # Create new dataframe for randomized data
-    randomized_data = []
+    # Simulate players in chunks, across a process pool when workers > 1
+    seed = resolve_seed(seed)
+    players_list = list(zip(players['player_id'].tolist(), players['base_price'].tolist()))
+    results = map_chunks(
+        partial(simulate_players, points_per_player=points_per_player, seed=seed),
+        split_into_chunks(players_list, workers),
+        workers
+    )
+    prices = np.concatenate([result[0] for result in results])
+    changes = np.concatenate([result[1] for result in results])
+    event_codes = np.concatenate([result[2] for result in results])
     
-    for _, player in players.iterrows():
-        player_id = player['player_id']
-        symbol = generate_symbol(player['name'], player['position'])
-        
-        # Get base price from original data
-        base_price = df[df['player_id'] == player_id]['price'].mean()
-        min_price = base_price * 0.1  # Minimum price is 10% of base price
-        
-        # Generate random timestamps throughout the day
-        start_time = datetime.strptime("09:30 AM", "%I:%M %p")
-        end_time = datetime.strptime("04:00 PM", "%I:%M %p")
-        time_delta = (end_time - start_time) / points_per_player
-        
-        current_price = base_price
-        for i in range(points_per_player):
-            # Adjust price change probability based on current price
-            if current_price < base_price * 0.2:  # If price is below 20% of base
-                price_change = random.uniform(-2, 8)  # More likely to go up
-            elif current_price > base_price * 2:  # If price is above 200% of base
-                price_change = random.uniform(-8, 2)  # More likely to go down
-            else:
-                price_change = random.uniform(-5, 5)
-            
-            # Calculate new price and ensure it doesn't go below minimum
-            new_price = max(min_price, current_price * (1 + price_change/100))
-            
-            # Generate random event
-            event = random.choice([
-                "Trade activity",
-                "Market movement",
-                "Player performance update",
-                "Team news",
-                "League announcement"
-            ])
-            
-            # Calculate timestamp
-            timestamp = start_time + i * time_delta
-            
-            randomized_data.append({
-                'player_id': player_id,
-                'name': player['name'],
-                'position': player['position'],
-                'symbol': symbol,
-                'time': timestamp.strftime('%I:%M %p'),
-                'price': round(new_price, 2),
-                'event': event,
-                'impact': f"{price_change:+.2f}%"
-            })
-            
-            current_price = new_price
+    return build_frame(players, prices, changes, event_codes, times)
+
+def iter_random_data(df, num_points=1000000, seed=None, workers=1, chunk_rows=1000000):
+    """Yield randomized intraday data in player_id order, a few players at a time
+
+    Each chunk holds whole players and at most about chunk_rows rows (never less
+    than one player), so memory stays bounded however large num_points is. The
+    rows match generate_random_data for the same seed.
+    """
+    players = prepare_players(df)
+    points_per_player = num_points // len(players)
+    times = session_times(points_per_player)
     
-    # Create new dataframe and sort by time for each player
-    new_df = pd.DataFrame(randomized_data)
-    new_df = new_df.sort_values(['player_id', 'time'])
+    seed = resolve_seed(seed)
+    players_per_chunk = max(1, chunk_rows // max(1, points_per_player))
+    bounds = range(0, len(players), players_per_chunk)
+    players_list = list(zip(players['player_id'].tolist(), players['base_price'].tolist()))
+    results = imap_chunks(
+        partial(simulate_players, points_per_player=points_per_player, seed=seed),
+        [players_list[start:start + players_per_chunk] for start in bounds],
+        workers
+    )
     
-    return new_df
+    for start, (prices, changes, event_codes) in zip(bounds, results):
+        chunk_players = players.iloc[start:start + players_per_chunk]
+        yield build_frame(chunk_players, prices, changes, event_codes, times)
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate a million randomized intraday data points")
+    parser.add_argument('--num-points', type=int, default=1000000, help="Total number of data points")
+    parser.add_argument('--seed', type=int, default=None, help="Seed for reproducible output")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument('--stream', action='store_true', help="Write the output chunk by chunk with bounded memory")
+    parser.add_argument('--chunk-rows', type=int, default=1000000, help="Approximate rows per chunk when streaming")
+    parser.add_argument('--format', choices=FORMATS, default='csv', help="Output file format")
+    args = parser.parse_args()
+    
     # Read original data
     df = pd.read_csv('player_intraday_data.csv')
+    filename = output_filename('player_intraday_data_randomized', args.format)
+    
+    if args.stream:
+        chunks = iter_random_data(df, args.num_points, seed=args.seed, workers=args.workers, chunk_rows=args.chunk_rows)
+        rows = write_stream(chunks, filename, args.format)
+        print(f"\nStreamed {rows} rows to {filename}")
+        return
     
     # Generate randomized data
-    randomized_df = generate_random_data(df)
+    randomized_df = generate_random_data(df, args.num_points, seed=args.seed, workers=args.workers)
     
-    # Save to new CSV
-    randomized_df.to_csv('player_intraday_data_randomized.csv', index=False)
+    # Save to new file
+    write_dataset(randomized_df, filename, args.format)
     
     # Print sample of data
     print("\nSample of randomized data:")
@@ -102,4 +219,4 @@ def main():
         print(f"{row['name']} ({row['position']}): {row['symbol']}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
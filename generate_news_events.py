@@ -1,152 +1,244 @@
 import pandas as pd
 import random
-from datetime import datetime, timedelta
+import argparse
+import os
+from functools import partial
 import numpy as np
+from generation_utils import resolve_seed, player_rng, repeat_per_player, split_into_chunks, map_chunks, imap_chunks
+from dataset_io import FORMATS, SESSION_DATE, concat_frames, output_filename, to_display_frame, write_dataset, write_stream
 
-def generate_player_specific_news(player_name, position, news_type='performance'):
-    """Generate position-specific news events for a player with different types"""
-    news_events = {
-        'performance': {
-            'P': [
-                f"{player_name} throws a no-hitter in simulated game",
-                f"{player_name} develops new pitch in bullpen session",
-                f"{player_name} records 10 strikeouts in live batting practice",
-                f"{player_name} struggles with control in bullpen",
-                f"{player_name} shows increased velocity in workout"
-            ],
-            'infield': [
-                f"{player_name} hits grand slam in spring training game",
-                f"{player_name} makes spectacular diving stop at {position}",
-                f"{player_name} goes 4-for-4 with 2 home runs",
-                f"{player_name} commits throwing error at {position}",
-                f"{player_name} turns double play with perfect timing"
-            ],
-            'outfield': [
-                f"{player_name} robs home run with leaping catch at wall",
-                f"{player_name} hits walk-off home run in extra innings",
-                f"{player_name} throws out runner at home plate",
-                f"{player_name} misjudges fly ball leading to extra bases",
-                f"{player_name} shows off arm strength in outfield practice"
-            ]
-        },
-        'injury': {
-            'P': [
-                f"{player_name} placed on 15-day injured list with forearm tightness",
-                f"{player_name} experiences shoulder discomfort during warmup",
-                f"{player_name} undergoes precautionary MRI on elbow",
-                f"{player_name} returns from injury rehabilitation assignment",
-                f"{player_name} cleared to resume throwing program"
-            ],
-            'infield': [
-                f"{player_name} day-to-day with hamstring tightness",
-                f"{player_name} exits game with wrist soreness",
-                f"{player_name} undergoes evaluation for knee injury",
-                f"{player_name} cleared to return after finger injury",
-                f"{player_name} begins rehab assignment at Triple-A"
-            ],
-            'outfield': [
-                f"{player_name} leaves game with oblique strain",
-                f"{player_name} dealing with ankle sprain after wall collision",
-                f"{player_name} undergoes concussion protocol",
-                f"{player_name} returns to lineup after quad injury",
-                f"{player_name} starts light running after leg injury"
-            ]
-        },
-        'team': [
-            f"Team considering contract extension for {player_name}",
-            f"{player_name} subject of trade rumors as deadline approaches",
-            f"{player_name} named team captain for upcoming season",
-            f"Manager praises {player_name}'s leadership in clubhouse",
-            f"{player_name} wins team's community service award"
+# Headline templates, formatted with the player's name and position
+NEWS_TEMPLATES = {
+    'performance': {
+        'P': [
+            "{name} throws a no-hitter in simulated game",
+            "{name} develops new pitch in bullpen session",
+            "{name} records 10 strikeouts in live batting practice",
+            "{name} struggles with control in bullpen",
+            "{name} shows increased velocity in workout"
+        ],
+        'infield': [
+            "{name} hits grand slam in spring training game",
+            "{name} makes spectacular diving stop at {position}",
+            "{name} goes 4-for-4 with 2 home runs",
+            "{name} commits throwing error at {position}",
+            "{name} turns double play with perfect timing"
         ],
-        'market': [
-            f"Analysts upgrade {player_name}'s season projections",
-            f"Multiple teams showing interest in {player_name}",
-            f"Market value of {player_name} rises after recent performance",
-            f"Insider reports growing confidence in {player_name}",
-            f"Fantasy baseball managers targeting {player_name} in trades"
+        'outfield': [
+            "{name} robs home run with leaping catch at wall",
+            "{name} hits walk-off home run in extra innings",
+            "{name} throws out runner at home plate",
+            "{name} misjudges fly ball leading to extra bases",
+            "{name} shows off arm strength in outfield practice"
         ]
-    }
-    
-    # Determine position category
+    },
+    'injury': {
+        'P': [
+            "{name} placed on 15-day injured list with forearm tightness",
+            "{name} experiences shoulder discomfort during warmup",
+            "{name} undergoes precautionary MRI on elbow",
+            "{name} returns from injury rehabilitation assignment",
+            "{name} cleared to resume throwing program"
+        ],
+        'infield': [
+            "{name} day-to-day with hamstring tightness",
+            "{name} exits game with wrist soreness",
+            "{name} undergoes evaluation for knee injury",
+            "{name} cleared to return after finger injury",
+            "{name} begins rehab assignment at Triple-A"
+        ],
+        'outfield': [
+            "{name} leaves game with oblique strain",
+            "{name} dealing with ankle sprain after wall collision",
+            "{name} undergoes concussion protocol",
+            "{name} returns to lineup after quad injury",
+            "{name} starts light running after leg injury"
+        ]
+    },
+    'team': [
+        "Team considering contract extension for {name}",
+        "{name} subject of trade rumors as deadline approaches",
+        "{name} named team captain for upcoming season",
+        "Manager praises {name}'s leadership in clubhouse",
+        "{name} wins team's community service award"
+    ],
+    'market': [
+        "Analysts upgrade {name}'s season projections",
+        "Multiple teams showing interest in {name}",
+        "Market value of {name} rises after recent performance",
+        "Insider reports growing confidence in {name}",
+        "Fantasy baseball managers targeting {name} in trades"
+    ]
+}
+
+NEWS_TYPES = ['performance', 'injury', 'team', 'market']
+NEWS_TYPE_WEIGHTS = [0.5, 0.2, 0.15, 0.15]
+POSITION_CATEGORIES = ['P', 'infield', 'outfield']
+
+def position_category(position):
+    """Map a position to the template category used for its news"""
     if position == "P":
-        pos_category = "P"
+        return "P"
     elif position in ["1B", "2B", "3B", "SS"]:
-        pos_category = "infield"
+        return "infield"
     else:
-        pos_category = "outfield"
+        return "outfield"
+
+def templates_for(news_type, pos_category):
+    """Templates for a news type, position-specific for performance and injury news"""
+    if news_type in ['team', 'market']:
+        return NEWS_TEMPLATES[news_type]
+    return NEWS_TEMPLATES[news_type][pos_category]
+
+# Template table per position category: the templates of every news type laid out
+# back to back, with the offset of each news type's block
+TEMPLATE_TABLES = {
+    pos_category: [template for news_type in NEWS_TYPES for template in templates_for(news_type, pos_category)]
+    for pos_category in POSITION_CATEGORIES
+}
+TEMPLATE_OFFSETS = {
+    pos_category: np.cumsum([0] + [len(templates_for(news_type, pos_category)) for news_type in NEWS_TYPES])
+    for pos_category in POSITION_CATEGORIES
+}
+
+def generate_player_specific_news(player_name, position, news_type='performance', rng=random):
+    """Generate position-specific news events for a player with different types"""
+    pos_category = position_category(position)
     
     # Select news type with weighted probabilities
-    news_type = random.choices(
-        ['performance', 'injury', 'team', 'market'],
-        weights=[0.5, 0.2, 0.15, 0.15]
-    )[0]
+    news_type = rng.choices(NEWS_TYPES, weights=NEWS_TYPE_WEIGHTS)[0]
     
-    if news_type in ['team', 'market']:
-        return random.choice(news_events[news_type])
-    else:
-        return random.choice(news_events[news_type][pos_category])
+    template = rng.choice(templates_for(news_type, pos_category))
+    return template.format(name=player_name, position=position)
+
+def draw_template_ids(rng, pos_category, num_events):
+    """Draw news types and templates for num_events events as indices into the template table"""
+    offsets = TEMPLATE_OFFSETS[pos_category]
+    news_types = rng.choice(len(NEWS_TYPES), size=num_events, p=NEWS_TYPE_WEIGHTS)
+    block_sizes = np.diff(offsets)[news_types]
+    return offsets[news_types] + (rng.random(num_events) * block_sizes).astype(np.int64)
+
+def generate_player_news(players_chunk, events_per_player, seed):
+    """Generate news events for a chunk of (player_id, name, position) tuples
 
-def generate_million_news_events(df, num_events=1000000):
-    """Generate a million news events from the randomized data"""
+    Each player gets its own generator seeded by (seed, player_id), so the
+    events do not depend on how players are split across workers. News types,
+    templates and times are drawn as whole arrays, and each player's template
+    table is formatted once, so events are just indices into it.
+    """
+    start_time = np.datetime64(f"{SESSION_DATE}T09:30", 'us')
+    session_us = (np.datetime64(f"{SESSION_DATE}T16:00", 'us') - start_time) // np.timedelta64(1, 'us')
+    
+    timestamps = []
+    event_codes = []
+    event_labels = []
+    for player_id, name, position in players_chunk:
+        rng = player_rng(seed, player_id)
+        pos_category = position_category(position)
+        
+        # Random timestamps throughout the day with microsecond resolution
+        offsets = np.sort(rng.integers(0, session_us, size=events_per_player, endpoint=True))
+        timestamps.append(start_time + offsets.astype('timedelta64[us]'))
+        
+        template_ids = draw_template_ids(rng, pos_category, events_per_player)
+        event_codes.append(template_ids + len(event_labels))
+        event_labels.extend(template.format(name=name, position=position) for template in TEMPLATE_TABLES[pos_category])
+    
+    # Different players can share a formatted headline, so merge duplicate labels
+    label_codes, labels = pd.factorize(pd.Series(event_labels, dtype=object))
+    ids, names, positions = zip(*players_chunk) if players_chunk else ((), (), ())
+    
+    return pd.DataFrame({
+        'player_id': np.repeat(np.array(ids, dtype=np.int64), events_per_player),
+        'name': repeat_per_player(names, events_per_player),
+        'position': repeat_per_player(positions, events_per_player),
+        'timestamp': np.concatenate(timestamps) if timestamps else np.array([], dtype='datetime64[us]'),
+        'event': pd.Categorical.from_codes(
+            label_codes[np.concatenate(event_codes)] if event_codes else np.array([], dtype=np.int64), labels
+        )
+    })
+
+def generate_million_news_events(df, num_events=1000000, seed=None, workers=1):
+    """Generate a million news events from the randomized data
+
+    The same seed gives bit-identical output for any number of workers.
+    """
     # Get unique players
     players = df[['player_id', 'name', 'position']].drop_duplicates()
     
-    # Create new dataframe for news events
-    news_events = []
-    
     # Calculate events per player (ensuring total will be close to num_events)
     events_per_player = num_events // len(players)
     
     print(f"Generating approximately {events_per_player} events per player...")
     
-    for _, player in players.iterrows():
-        # Generate random timestamps throughout the day
-        start_time = datetime.strptime("09:30 AM", "%I:%M %p")
-        end_time = datetime.strptime("04:00 PM", "%I:%M %p")
-        
-        # Generate random timestamps
-        timestamps = sorted([
-            start_time + timedelta(
-                seconds=random.randint(0, int((end_time - start_time).total_seconds()))
-            )
-            for _ in range(events_per_player)
-        ])
-        
-        for timestamp in timestamps:
-            # Generate news event
-            event = generate_player_specific_news(player['name'], player['position'])
-            
-            news_events.append({
-                'player_id': player['player_id'],
-                'name': player['name'],
-                'position': player['position'],
-                'time': timestamp.strftime('%I:%M %p'),
-                'event': event
-            })
+    # Generate players in chunks, across a process pool when workers > 1
+    seed = resolve_seed(seed)
+    players_list = list(players.itertuples(index=False, name=None))
+    chunks = map_chunks(
+        partial(generate_player_news, events_per_player=events_per_player, seed=seed),
+        split_into_chunks(players_list, workers),
+        workers
+    )
     
     # Create new dataframe and sort by time
-    news_df = pd.DataFrame(news_events)
-    news_df = news_df.sort_values(['time', 'player_id'])
+    news_df = concat_frames(chunks)
+    news_df = news_df.sort_values(['timestamp', 'player_id'], kind='stable')
     
     return news_df
 
+def iter_news_events(df, num_events=1000000, seed=None, workers=1, chunk_rows=1000000):
+    """Yield news events in player_id/time order, a few players at a time
+
+    Each chunk holds whole players and at most about chunk_rows rows (never less
+    than one player), so memory stays bounded however large num_events is. The
+    events match generate_million_news_events for the same seed; only the row
+    order differs.
+    """
+    players = df[['player_id', 'name', 'position']].drop_duplicates().sort_values('player_id', kind='stable')
+    events_per_player = num_events // len(players)
+    
+    seed = resolve_seed(seed)
+    players_per_chunk = max(1, chunk_rows // max(1, events_per_player))
+    players_list = list(players.itertuples(index=False, name=None))
+    yield from imap_chunks(
+        partial(generate_player_news, events_per_player=events_per_player, seed=seed),
+        [players_list[start:start + players_per_chunk] for start in range(0, len(players_list), players_per_chunk)],
+        workers
+    )
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate a million player news events")
+    parser.add_argument('--num-events', type=int, default=1000000, help="Total number of news events")
+    parser.add_argument('--seed', type=int, default=None, help="Seed for reproducible output")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument('--stream', action='store_true', help="Write the output chunk by chunk with bounded memory")
+    parser.add_argument('--chunk-rows', type=int, default=1000000, help="Approximate rows per chunk when streaming")
+    parser.add_argument('--format', choices=FORMATS, default='csv', help="Output file format")
+    args = parser.parse_args()
+    
     # Read randomized data
     df = pd.read_csv('player_intraday_data_randomized.csv')
+    filename = output_filename('player_news_events_million', args.format)
+    
+    if args.stream:
+        print("Streaming news events...")
+        chunks = iter_news_events(df, args.num_events, seed=args.seed, workers=args.workers, chunk_rows=args.chunk_rows)
+        rows = write_stream(chunks, filename, args.format)
+        print(f"\nStreamed {rows} news events to {filename}")
+        return
     
     # Generate million news events
     print("Generating news events...")
-    news_df = generate_million_news_events(df)
+    news_df = generate_million_news_events(df, args.num_events, seed=args.seed, workers=args.workers)
     
-    # Save to new CSV
-    news_df.to_csv('player_news_events_million.csv', index=False)
+    # Save to new file
+    write_dataset(news_df, filename, args.format)
     print(f"\nGenerated {len(news_df)} news events")
     
     # Print sample of news events
     print("\nSample of news events:")
     pd.set_option('display.max_colwidth', None)
-    print(news_df[['player_id', 'name', 'position', 'time', 'event']].head(10))
+    print(to_display_frame(news_df.head(10))[['player_id', 'name', 'position', 'time', 'event']])
     
     # Print some statistics
     print("\nEvents per player:")
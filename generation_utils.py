@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+def resolve_seed(seed=None):
+    """Return a concrete run seed, drawing fresh entropy when none is given"""
+    if seed is None:
+        return int(np.random.SeedSequence().entropy)
+    return int(seed)
+
+def player_seed_sequence(seed, player_id, stream=None):
+    """Seed sequence for one player, derived only from the run seed, player_id and an optional stream number"""
+    spawn_key = (int(player_id),) if stream is None else (int(player_id), int(stream))
+    return np.random.SeedSequence(seed, spawn_key=spawn_key)
+
+def player_rng(seed, player_id, stream=None):
+    """Independent NumPy generator for one player, with separate streams for unrelated draws"""
+    return np.random.default_rng(player_seed_sequence(seed, player_id, stream))
+
+def generate_symbol(name, position):
+    """Stock symbol of a player: first initial, up to 3 letters of the last name and the position (JHEIMC)"""
+    parts = name.split()
+    if len(parts) >= 2:
+        symbol = (parts[0][0] + parts[-1][:3]).upper()
+    else:
+        symbol = name[:4].upper()
+    return symbol + position
+
+def repeat_per_player(values, rows_per_player):
+    """Categorical with each player's value repeated rows_per_player times, for player-major row layouts"""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    return pd.Categorical.from_codes(np.repeat(codes, rows_per_player), uniques)
+
+def split_into_chunks(items, workers, chunks_per_worker=4):
+    """Split a list into contiguous chunks, a few per worker to balance load"""
+    num_chunks = max(1, min(len(items), workers * chunks_per_worker))
+    bounds = np.linspace(0, len(items), num_chunks + 1).astype(int)
+    return [items[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+def map_chunks(func, chunks, workers=1):
+    """Apply func to each chunk, in a process pool when workers > 1, keeping chunk order"""
+    return list(imap_chunks(func, chunks, workers))
+
+def imap_chunks(func, chunks, workers=1, max_in_flight=None):
+    """Lazily yield func(chunk) in chunk order
+
+    With workers > 1 at most max_in_flight chunks (default 2 per worker) are
+    submitted or waiting to be consumed at once, so a slow consumer such as a
+    file writer keeps memory bounded.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield func(chunk)
+        return
+    
+    max_in_flight = max_in_flight or workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(func, chunk))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,253 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BASE_URL = "https://statsapi.mlb.com/api/v1"
+PLAYER_HYDRATE = "stats(group=[hitting,pitching,fielding],type=[yearByYear])"
+
+CACHE_DIR = ".stats_cache"
+# Seconds a cached response is served without revalidation, per endpoint
+CACHE_TTLS = {
+    "teams": 24 * 3600,
+    "roster": 6 * 3600,
+    "people": 12 * 3600
+}
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+def endpoint_of(url):
+    """Endpoint name of a Stats API URL, used to pick its cache TTL"""
+    if "/roster/" in url:
+        return "roster"
+    if "/people/" in url:
+        return "people"
+    return "teams"
+
+class ResponseCache:
+    """On-disk cache of JSON responses keyed by URL
+
+    Each entry stores the body with its ETag/Last-Modified validators and the
+    time it was last confirmed fresh. Entries younger than their endpoint TTL
+    are served directly; older ones are revalidated with a conditional request.
+    When the cache grows past max_bytes the least recently used entries are
+    evicted.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttls=None, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.ttls = {**CACHE_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith(".json"))
+
+    def path_for(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def load(self, url):
+        """Cached entry for url, or None"""
+        path = self.path_for(url)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    def is_fresh(self, entry):
+        ttl = self.ttls.get(endpoint_of(entry["url"]), 0)
+        return time.time() - entry["fetched_at"] < ttl
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """Write an entry atomically and evict old entries if over the size limit"""
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+            "body": body
+        }
+        path = self.path_for(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        with self.lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self.total_bytes += os.path.getsize(path) - old_size
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+        return entry
+
+    def touch(self, entry):
+        """Mark an entry as fresh again after a 304 Not Modified"""
+        return self.store(entry["url"], entry["body"], entry.get("etag"), entry.get("last_modified"))
+
+    def evict(self):
+        """Remove least recently used entries until under 90% of max_bytes"""
+        entries = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in entries:
+            if self.total_bytes <= self.max_bytes * 0.9:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self.total_bytes -= size
+
+def create_session(max_connections=16, retries=5, backoff_factor=0.5):
+    """Requests session with a shared keep-alive connection pool
+
+    GET requests are retried with exponential backoff on connection errors,
+    429 and 5xx responses, honouring Retry-After when the server sends it.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+class StatsClient:
+    """Concurrent client for the MLB Stats API endpoints used by the scrapers"""
+
+    def __init__(self, base_url=BASE_URL, season="2023", concurrency=16, retries=5, backoff_factor=0.5, timeout=30,
+                 cache=None, offline=False):
+        self.base_url = base_url.rstrip("/")
+        self.season = season
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.session = create_session(concurrency, retries, backoff_factor)
+        self.cache = cache
+        self.offline = offline
+        self.stats = {"cached": 0, "revalidated": 0, "downloaded": 0}
+
+    def get_json(self, path):
+        """GET a JSON document, returning None (after retries) on failure
+
+        With a cache, fresh entries are served without a request and stale ones
+        are revalidated with If-None-Match/If-Modified-Since. If the request
+        fails, or the client is offline, any cached copy is served instead.
+        """
+        url = f"{self.base_url}{path}"
+        entry = self.cache.load(url) if self.cache else None
+        if entry and (self.offline or self.cache.is_fresh(entry)):
+            self.stats["cached"] += 1
+            return json.loads(entry["body"])
+        if self.offline:
+            print(f"No cached response for {url}")
+            return None
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            print(f"Request to {url} failed: {e}")
+            return json.loads(entry["body"]) if entry else None
+
+        if response.status_code == 304 and entry:
+            self.stats["revalidated"] += 1
+            self.cache.touch(entry)
+            return json.loads(entry["body"])
+        if response.status_code != 200:
+            print(f"Request to {url} failed: {response.status_code}")
+            return json.loads(entry["body"]) if entry else None
+
+        self.stats["downloaded"] += 1
+        if self.cache:
+            self.cache.store(url, response.text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return response.json()
+
+    def fetch_teams(self):
+        """Fetch all MLB teams (sportId=1) for the season, or None on failure"""
+        data = self.get_json(f"/teams?season={self.season}&sportId=1")
+        if data is None:
+            print("Failed to fetch teams")
+            return None
+        return data.get("teams", [])
+
+    def fetch_roster(self, team_id):
+        """Fetch the active roster of one team, or None on failure"""
+        data = self.get_json(f"/teams/{team_id}/roster/Active?season={self.season}")
+        if data is None:
+            print(f"Failed to fetch the roster of team {team_id}")
+            return None
+        return data.get("roster", [])
+
+    def fetch_active_players(self):
+        """Fetch the active rosters of all teams in parallel
+
+        Returns (players, complete): the roster entries, each tagged with its
+        team's id and name under "team", and whether the teams and every
+        roster were fetched. An incomplete list must not be taken to mean
+        the missing players left the league.
+        """
+        teams = self.fetch_teams()
+        if teams is None:
+            return [], False
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            rosters = list(executor.map(self.fetch_roster, [team.get("id") for team in teams]))
+        players = [
+            {**player, "team": {"id": team.get("id"), "name": team.get("name")}}
+            for team, roster in zip(teams, rosters) for player in roster or []
+        ]
+        return players, all(roster is not None for roster in rosters)
+
+    def fetch_player_stats(self, player_id):
+        """Fetch a player with year-by-year hitting, pitching and fielding stats"""
+        data = self.get_json(f"/people/{player_id}?hydrate={PLAYER_HYDRATE}")
+        if not data or not data.get("people"):
+            print(f"Failed to fetch stats for player {player_id}")
+            return None
+        return data["people"][0]
+
+    def fetch_players_stats(self, player_ids):
+        """Fetch many players concurrently, returning results in the order of player_ids"""
+        results = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for count, player_data in enumerate(executor.map(self.fetch_player_stats, player_ids), 1):
+                results.append(player_data)
+                if count % 100 == 0:
+                    print(f"Fetched {count}/{len(player_ids)} players")
+        return results
+
+def add_client_arguments(parser):
+    """Add the shared Stats API client options to an argument parser"""
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum concurrent requests")
+    parser.add_argument("--base-url", default=BASE_URL, help="Stats API base URL")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="Directory for the on-disk response cache")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the response cache")
+    parser.add_argument("--offline", action="store_true", help="Serve only cached responses, never hit the network")
+
+def client_from_args(args):
+    """Build a StatsClient from parsed add_client_arguments options"""
+    cache = None if args.no_cache else ResponseCache(args.cache_dir)
+    return StatsClient(
+        base_url=args.base_url,
+        season=args.season,
+        concurrency=args.concurrency,
+        cache=cache,
+        offline=args.offline
+    )
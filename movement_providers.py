@@ -0,0 +1,512 @@
+import json
+import os
+import numpy as np
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List
+from generate_news_events import (
+    NEWS_TYPES, POSITION_CATEGORIES, TEMPLATE_OFFSETS, TEMPLATE_TABLES, draw_template_ids, position_category
+)
+from generation_utils import player_rng, resolve_seed
+from rate_limiter import RateLimiter, estimate_tokens
+from valuation import BATTER_PARAMS, PITCHER_PARAMS, StatsTable, decay_weights, linear_price
+
+def gemini_model(name='gemini-pro'):
+    """Gemini model, configuring the API key from GOOGLE_API_KEY on first use
+
+    The SDK is imported here rather than at module level because it takes
+    over a second to import, and offline providers never need it.
+    """
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
+    return genai.GenerativeModel(name)
+
+# Gemini quota and batching defaults for price-movement generation
+REQUESTS_PER_MINUTE = 60
+TOKENS_PER_MINUTE = None
+CONCURRENCY = 4
+MAX_BATCH_SIZE = 20
+MAX_PROMPT_CHARS = 4000
+MAX_ATTEMPTS = 3
+
+def movement_prompt(players_batch: List[dict]) -> str:
+    """Batch prompt asking for one movement percentage per player"""
+    return f"""
+    Given these players' recent performances, generate a daily stock price movement percentage 
+    between -5% and +5% for each player based on their performance trend.
+    Return only a comma-separated list of percentages in the same order as the players.
+    
+    Players:
+    {[f"{i+1}. {p['fullName']} ({p['position']}): {p['stats'].get('2023', 'No recent stats')}" 
+       for i, p in enumerate(players_batch)]}
+    """
+
+def parse_movements(text: str, count: int) -> List[float]:
+    """Comma-separated percentages clipped to +/-5%; raises ValueError unless there are exactly count"""
+    movements = [float(x.strip().replace('%', '')) for x in text.strip().split(',')]
+    if len(movements) != count:
+        raise ValueError(f"Expected {count} movements, got {len(movements)}")
+    return [max(-5.0, min(5.0, m)) for m in movements]
+
+def generate_daily_price_movements(players_batch: List[dict], model=None) -> List[float]:
+    """Generate price movement using Gemini API, raising if the response cannot be used"""
+    model = model or gemini_model()
+    response = model.generate_content(movement_prompt(players_batch))
+    return parse_movements(response.text, len(players_batch))
+
+def plan_batches(players_data, max_batch_size=MAX_BATCH_SIZE, max_prompt_chars=MAX_PROMPT_CHARS):
+    """Split players into batches of up to max_batch_size whose prompts fit in max_prompt_chars
+
+    A player whose prompt alone is too long still gets a batch of their own.
+    """
+    batches, batch = [], []
+    for player in players_data:
+        if batch and (len(batch) == max_batch_size or len(movement_prompt(batch + [player])) > max_prompt_chars):
+            batches.append(batch)
+            batch = []
+        batch.append(player)
+    if batch:
+        batches.append(batch)
+    return batches
+
+def is_rate_limited(error):
+    from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+    return isinstance(error, (ResourceExhausted, TooManyRequests))
+
+def generate_batch_movements(batch, model, limiter, max_attempts=MAX_ATTEMPTS, stats=None):
+    """Movements for one batch, splitting it in half on failure instead of zero-filling
+
+    Rate-limit errors retry the same batch after throttling. Any other
+    failure retries each half separately, so one bad response only costs the
+    players it actually affects. A single player that still fails after
+    max_attempts gets a 0% movement and is counted in stats["failed"].
+    stats is not locked: give each concurrent batch its own dict.
+    """
+    stats = stats if stats is not None else {}
+    for attempt in range(1, max_attempts + 1):
+        limiter.acquire(estimate_tokens(movement_prompt(batch)))
+        stats["requests"] = stats.get("requests", 0) + 1
+        try:
+            return generate_daily_price_movements(batch, model)
+        except Exception as e:
+            if is_rate_limited(e):
+                print(f"Rate limited on a batch of {len(batch)}, backing off (attempt {attempt}/{max_attempts})")
+                limiter.throttle()
+                continue
+            if len(batch) > 1:
+                print(f"Batch of {len(batch)} failed ({e}), splitting")
+                stats["splits"] = stats.get("splits", 0) + 1
+                middle = len(batch) // 2
+                return (generate_batch_movements(batch[:middle], model, limiter, max_attempts, stats)
+                        + generate_batch_movements(batch[middle:], model, limiter, max_attempts, stats))
+            print(f"Price movement for {batch[0]['fullName']} failed ({e}), attempt {attempt}/{max_attempts}")
+    stats["failed"] = stats.get("failed", 0) + len(batch)
+    print(f"Giving up on {', '.join(p['fullName'] for p in batch)}, using 0% movement")
+    return [0.0] * len(batch)
+
+def generate_all_movements(players_data, model=None, limiter=None, concurrency=CONCURRENCY,
+                           max_batch_size=MAX_BATCH_SIZE, max_prompt_chars=MAX_PROMPT_CHARS,
+                           max_attempts=MAX_ATTEMPTS):
+    """Movements for all players, aligned with players_data
+
+    Batches run concurrently on a thread pool, gated by a shared rate limiter
+    so throughput tracks the quota instead of a fixed sleep per batch. Pass a
+    fake model (anything with generate_content(prompt) returning an object
+    with .text) to run without the API.
+    """
+    model = model or gemini_model()
+    limiter = limiter or RateLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE)
+    stats = {"requests": 0, "splits": 0, "failed": 0}
+    batches = plan_batches(players_data, max_batch_size, max_prompt_chars)
+
+    # Each batch counts into its own dict, merged here, so workers never share one
+    def run_batch(batch):
+        batch_stats = {}
+        return generate_batch_movements(batch, model, limiter, max_attempts, batch_stats), batch_stats
+
+    movements = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for count, (batch_movements, batch_stats) in enumerate(executor.map(run_batch, batches), 1):
+            movements.extend(batch_movements)
+            for key, value in batch_stats.items():
+                stats[key] += value
+            print(f"Processed batch {count}/{len(batches)}...")
+    print(f"Price movements: {stats}")
+    return movements
+
+def generate_news_events(player_data, trading_hours=7, model=None):
+    """Generate broader news events that could affect player value"""
+    model = model or gemini_model()
+    
+    prompt = f"""
+    Generate {trading_hours} realistic news events that could affect this baseball player's market value.
+    Include team news, league updates, and general baseball market conditions.
+    For each event, provide:
+    1. Time (between 9:30 AM and 4:00 PM)
+    2. News headline
+    3. Detailed description
+    4. Category (team, league, market, or personal)
+    5. Sentiment (positive, negative, or neutral)
+    
+    Player: {player_data['name']}
+    Position: {player_data['position']}
+    
+    Provide response in valid JSON array format exactly like this example:
+    [
+        {{
+            "time": "10:30 AM",
+            "headline": "Team Announces Lineup Changes",
+            "description": "Manager confirms starting rotation adjustment",
+            "category": "team",
+            "sentiment": "neutral"
+        }}
+    ]
+    
+    Ensure all times are in HH:MM AM/PM format and sentiment is one of: positive, negative, neutral
+    """
+    
+    try:
+        response = model.generate_content(prompt)
+        response_text = response.text.strip()
+        
+        # Clean up common JSON formatting issues
+        response_text = response_text.replace('\n', '')
+        response_text = response_text.replace('```json', '').replace('```', '')
+        # Remove 'JSON' prefix if present
+        response_text = response_text.replace('JSON', '', 1)
+        
+        try:
+            events = json.loads(response_text)
+        except json.JSONDecodeError as je:
+            print(f"JSON parsing error for {player_data['name']}: {je}")
+            print(f"Raw response: {response_text}")
+            return []
+        
+        # Validate event format
+        valid_events = []
+        for event in events:
+            if all(k in event for k in ('time', 'headline', 'description', 'category', 'sentiment')):
+                try:
+                    # Ensure time format is correct
+                    datetime.strptime(event['time'], '%I:%M %p')
+                    # Ensure sentiment is valid
+                    if event['sentiment'].lower() in ('positive', 'negative', 'neutral'):
+                        valid_events.append(event)
+                except ValueError as e:
+                    print(f"Validation error for event: {event}")
+                    continue
+        
+        return valid_events
+    except Exception as e:
+        print(f"Error generating news events for {player_data['name']}: {e}")
+        return []
+
+def generate_intraday_events(player_data, trading_hours=7, model=None):
+    """Generate intraday events and price impacts for a player"""
+    model = model or gemini_model()
+    
+    prompt = f"""
+    Generate {trading_hours} realistic intraday events for this baseball player that could affect their stock price.
+    For each event, provide:
+    1. Time (between 9:30 AM and 4:00 PM)
+    2. Event description
+    3. Price impact (-3% to +3%)
+    
+    Player: {player_data['name']}
+    Position: {player_data['position']}
+    Current Price: ${player_data['current_price']}
+    
+    Provide response in valid JSON array format exactly like this example:
+    [
+        {{"time": "10:30 AM", "event": "Player announced as starting pitcher", "impact": 1.2}},
+        {{"time": "11:45 AM", "event": "Team announces roster move", "impact": -0.8}}
+    ]
+    
+    Ensure all times are in HH:MM AM/PM format and impacts are numbers between -3.0 and 3.0.
+    """
+    
+    try:
+        response = model.generate_content(prompt)
+        response_text = response.text.strip()
+        
+        # Clean up common JSON formatting issues
+        response_text = response_text.replace('\n', '')
+        response_text = response_text.replace('```json', '').replace('```', '')
+        
+        try:
+            events = json.loads(response_text)
+        except json.JSONDecodeError as je:
+            print(f"JSON parsing error for {player_data['name']}: {je}")
+            print(f"Raw response: {response_text}")
+            return []
+        
+        # Validate event format
+        valid_events = []
+        for event in events:
+            if all(k in event for k in ('time', 'event', 'impact')):
+                try:
+                    # Ensure time format is correct
+                    datetime.strptime(event['time'], '%I:%M %p')
+                    # Ensure impact is a number within range
+                    impact = float(event['impact'])
+                    if -3.0 <= impact <= 3.0:
+                        valid_events.append(event)
+                except (ValueError, TypeError) as e:
+                    print(f"Validation error for event: {event}")
+                    continue
+        
+        return valid_events
+    except Exception as e:
+        print(f"Error generating events for {player_data['name']}: {e}")
+        return []
+
+# Independent random streams per player for the statistical provider
+DAILY_STREAM = 1
+INTRADAY_STREAM = 2
+NEWS_STREAM = 3
+
+SESSION_MINUTES = 390  # 9:30 AM to 4:00 PM
+NEWS_CATEGORIES = {'performance': 'personal', 'injury': 'personal', 'team': 'team', 'market': 'market'}
+
+# Whether each headline template is good (+1) or bad (-1) news for the player: injuries are bad and
+# everything else good, except for these templates that go the other way
+NEWS_TYPE_SIGNS = {'performance': 1, 'injury': -1, 'team': 1, 'market': 1}
+CONTRARY_TEMPLATES = {
+    "{name} struggles with control in bullpen",
+    "{name} commits throwing error at {position}",
+    "{name} misjudges fly ball leading to extra bases",
+    "{name} returns from injury rehabilitation assignment",
+    "{name} cleared to resume throwing program",
+    "{name} cleared to return after finger injury",
+    "{name} begins rehab assignment at Triple-A",
+    "{name} returns to lineup after quad injury",
+    "{name} starts light running after leg injury"
+}
+
+def template_news_types(pos_category, template_ids):
+    """Index into NEWS_TYPES of each template in a position category's template table"""
+    return np.searchsorted(TEMPLATE_OFFSETS[pos_category], template_ids, side='right') - 1
+
+def template_signs(pos_category):
+    templates = TEMPLATE_TABLES[pos_category]
+    news_types = template_news_types(pos_category, np.arange(len(templates)))
+    signs = np.array([NEWS_TYPE_SIGNS[NEWS_TYPES[type_index]] for type_index in news_types])
+    return np.where([template in CONTRARY_TEMPLATES for template in templates], -signs, signs)
+
+TEMPLATE_SIGNS = {pos_category: template_signs(pos_category) for pos_category in POSITION_CATEGORIES}
+
+class MovementProvider(ABC):
+    """Source of daily price movements, intraday events and news for the market generators
+
+    daily_movements takes players_data_yearly records and returns one
+    percentage per player. intraday_events and news_events take market rows
+    (player_id, name, position, current_price, daily_movement) and return one
+    list of events per player, in the formats the Gemini prompts ask for.
+    """
+
+    @abstractmethod
+    def daily_movements(self, players_data):
+        ...
+
+    @abstractmethod
+    def intraday_events(self, players, trading_hours=7):
+        ...
+
+    @abstractmethod
+    def news_events(self, players, trading_hours=7):
+        ...
+
+class GeminiMovementProvider(MovementProvider):
+    """Movements and events generated by Gemini, rate limited and run concurrently
+
+    The model is created on first use unless one is passed in, so a fake
+    model can stand in for the API.
+    """
+
+    def __init__(self, model=None, limiter=None, concurrency=CONCURRENCY, max_batch_size=MAX_BATCH_SIZE,
+                 max_prompt_chars=MAX_PROMPT_CHARS, max_attempts=MAX_ATTEMPTS):
+        self._model = model
+        self.limiter = limiter or RateLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE)
+        self.concurrency = concurrency
+        self.max_batch_size = max_batch_size
+        self.max_prompt_chars = max_prompt_chars
+        self.max_attempts = max_attempts
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = gemini_model()
+        return self._model
+
+    def daily_movements(self, players_data):
+        return generate_all_movements(
+            players_data, self.model, self.limiter, self.concurrency,
+            self.max_batch_size, self.max_prompt_chars, self.max_attempts
+        )
+
+    def per_player(self, generate, players, trading_hours):
+        model = self.model
+
+        def run(player):
+            self.limiter.acquire()
+            return generate(player, trading_hours, model)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(run, players))
+
+    def intraday_events(self, players, trading_hours=7):
+        return self.per_player(generate_intraday_events, players, trading_hours)
+
+    def news_events(self, players, trading_hours=7):
+        return self.per_player(generate_news_events, players, trading_hours)
+
+def parse_percent(value):
+    """Percentage from a value such as "+1.25%" or 1.25"""
+    if isinstance(value, str):
+        return float(value.strip().rstrip('%'))
+    return float(value)
+
+def session_time(minutes):
+    """Minutes after 9:30 AM formatted as HH:MM AM/PM"""
+    hour, minute = divmod(9 * 60 + 30 + int(minutes), 60)
+    return f"{(hour - 1) % 12 + 1:02d}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+class StatisticalMovementProvider(MovementProvider):
+    """Seeded offline model conditioned on the same stats and positions as the Gemini prompts
+
+    Daily drift comes from the player's valuation on the base-price
+    formulas. It combines the change in the latest season against a
+    decay-weighted average of earlier seasons with the latest season's
+    standing among pitchers or batters. Normal noise is added and the sum is
+    clipped to +/-5%, the range the prompt asks for. Intraday impacts spread
+    the daily movement over the session, with more volatility for pitchers,
+    and events and news use the news headline templates. Every player draws
+    from generators seeded by (seed, player_id), so results do not depend on
+    the order or batching of players.
+    """
+
+    def __init__(self, seed=None, season="2023", daily_volatility=1.5, trend_scale=2.5, level_scale=0.5,
+                 intraday_volatility=0.9, pitcher_intraday_volatility=1.2):
+        self.seed = resolve_seed(seed)
+        self.season = season
+        self.daily_volatility = daily_volatility
+        self.trend_scale = trend_scale
+        self.level_scale = level_scale
+        self.intraday_volatility = intraday_volatility
+        self.pitcher_intraday_volatility = pitcher_intraday_volatility
+
+    @staticmethod
+    def player_value(table, stats):
+        return np.where(table.is_pitcher, linear_price(stats, PITCHER_PARAMS), linear_price(stats, BATTER_PARAMS))
+
+    @staticmethod
+    def standing(value, is_pitcher, has_stats):
+        """Z-score of value among pitchers or among batters, clipped to +/-2"""
+        level = np.zeros(len(value))
+        for group in (is_pitcher, ~is_pitcher):
+            mask = group & has_stats
+            if mask.sum() > 1 and value[mask].std() > 0:
+                level[mask] = (value[mask] - value[mask].mean()) / value[mask].std()
+        return np.clip(level, -2.0, 2.0)
+
+    def daily_movements(self, players_data):
+        table = StatsTable.from_players(players_data)
+        latest, has_latest = table.weighted_stats({self.season: 1.0})
+        prior, has_prior = table.weighted_stats(decay_weights([s for s in table.seasons if s < self.season]))
+        value = self.player_value(table, latest)
+        prior_value = self.player_value(table, prior)
+
+        trend = np.where(has_latest & has_prior, (value - prior_value) / np.maximum(np.abs(prior_value), 1.0), 0.0)
+        drift = self.trend_scale * np.clip(trend, -1.0, 1.0) + self.level_scale * self.standing(
+            value, table.is_pitcher, has_latest
+        )
+        noise = np.array([player_rng(self.seed, player_id, DAILY_STREAM).standard_normal() for player_id in table.ids])
+        return np.round(np.clip(drift + self.daily_volatility * noise, -5.0, 5.0), 2).tolist()
+
+    def intraday_events(self, players, trading_hours=7):
+        all_events = []
+        for player in players:
+            rng = player_rng(self.seed, player['player_id'], INTRADAY_STREAM)
+            pos_category = position_category(player['position'])
+            volatility = self.pitcher_intraday_volatility if player['position'] == 'P' else self.intraday_volatility
+            mean = parse_percent(player.get('daily_movement', 0)) / trading_hours
+
+            minutes = np.sort(rng.integers(0, SESSION_MINUTES, size=trading_hours, endpoint=True))
+            templates = TEMPLATE_TABLES[pos_category]
+            template_ids = draw_template_ids(rng, pos_category, trading_hours)
+            # Each impact moves the way its headline reads; the day's movement makes good news
+            # bigger on up days and bad news bigger on down days
+            signs = TEMPLATE_SIGNS[pos_category][template_ids]
+            sizes = np.abs(rng.normal(signs * mean, volatility, trading_hours))
+            impacts = (signs * np.clip(sizes, 0.01, 3.0)).round(2)
+            all_events.append([
+                {
+                    "time": session_time(minute),
+                    "event": templates[template_id].format(name=player['name'], position=player['position']),
+                    "impact": float(impact)
+                }
+                for minute, template_id, impact in zip(minutes, template_ids, impacts)
+            ])
+        return all_events
+
+    def news_events(self, players, trading_hours=7):
+        all_news = []
+        for player in players:
+            rng = player_rng(self.seed, player['player_id'], NEWS_STREAM)
+            pos_category = position_category(player['position'])
+
+            minutes = np.sort(rng.integers(0, SESSION_MINUTES, size=trading_hours, endpoint=True))
+            templates = TEMPLATE_TABLES[pos_category]
+            template_ids = draw_template_ids(rng, pos_category, trading_hours)
+            news_types = template_news_types(pos_category, template_ids)
+            # The headline sets the direction of the sentiment and tone only its strength: weak news is
+            # neutral. Tone leans with the day's movement, so good news reads stronger on up days and bad
+            # news on down days. Injuries are always negative.
+            signs = TEMPLATE_SIGNS[pos_category][template_ids]
+            lean = parse_percent(player.get('daily_movement', 0)) / 5.0
+            strengths = signs * rng.normal(lean, 1.0, trading_hours)
+
+            news = []
+            for minute, template_id, type_index, sign, strength in zip(
+                minutes, template_ids, news_types, signs, strengths
+            ):
+                news_type = NEWS_TYPES[type_index]
+                headline = templates[template_id].format(name=player['name'], position=player['position'])
+                if sign < 0 and (news_type == 'injury' or strength > 0.5):
+                    sentiment = 'negative'
+                else:
+                    sentiment = 'positive' if sign > 0 and strength > 0.5 else 'neutral'
+                news.append({
+                    "time": session_time(minute),
+                    "headline": headline,
+                    "description": f"{news_type.capitalize()} news: {headline}",
+                    "category": NEWS_CATEGORIES[news_type],
+                    "sentiment": sentiment
+                })
+            all_news.append(news)
+        return all_news
+
+PROVIDERS = {
+    'gemini': GeminiMovementProvider,
+    'statistical': StatisticalMovementProvider
+}
+
+def add_provider_arguments(parser):
+    """Add the shared movement provider options to an argument parser"""
+    parser.add_argument("--provider", choices=sorted(PROVIDERS), default="gemini",
+                        help="Source of movements and events; statistical runs offline")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the statistical provider")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Concurrent Gemini requests")
+    parser.add_argument("--requests-per-minute", type=int, default=REQUESTS_PER_MINUTE, help="Gemini request quota")
+
+def provider_from_args(args):
+    """Build a MovementProvider from parsed add_provider_arguments options"""
+    if args.provider == "statistical":
+        provider = StatisticalMovementProvider(seed=args.seed)
+        print(f"Statistical provider seed: {provider.seed}")
+        return provider
+    return GeminiMovementProvider(
+        limiter=RateLimiter(args.requests_per_minute, TOKENS_PER_MINUTE),
+        concurrency=args.concurrency
+    )
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+ORDER_URL = "http://localhost:3030/order"
+
+def create_order_session(max_connections=8, retries=3, backoff_factor=0.2):
+    """Requests session with a keep-alive pool for order submission
+
+    Only failures where the order cannot have been processed are retried:
+    connection errors and 503 Service Unavailable. A 502 or 504 can come from a
+    gateway after the order reached the server, and read timeouts can follow
+    an accepted order, so neither is retried and no order is sent twice.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        other=0,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[503],
+        allowed_methods=frozenset(["POST"]),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+class OrderClient:
+    """Async order client on a pooled keep-alive session
+
+    Requests run on a bounded thread pool so the event loop never blocks on the
+    network. Orders submitted in the same event loop tick are flushed together:
+    as one JSON array to batch_url when it is set, otherwise concurrently over
+    the pool. Submission latencies are kept for throughput and p99 reporting.
+    """
+
+    def __init__(self, url=ORDER_URL, max_connections=8, timeout=5.0, retries=3, backoff_factor=0.2,
+                 batch_url=None, latency_window=10000):
+        self.url = url
+        self.batch_url = batch_url
+        self.timeout = timeout
+        self.session = create_order_session(max_connections, retries, backoff_factor)
+        self.executor = ThreadPoolExecutor(max_workers=max_connections)
+        self.queue = []
+        self.latencies = deque(maxlen=latency_window)
+        self.submitted = 0
+        self.failed = 0
+        self.started_at = time.monotonic()
+
+    async def submit(self, order):
+        """Submit an order and return the server's response"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self.queue:
+            loop.call_soon(self.flush)
+        self.queue.append((order, future, time.monotonic()))
+        return await future
+
+    def flush(self):
+        """Send every order queued during the current tick"""
+        queued, self.queue = self.queue, []
+        if self.batch_url and len(queued) > 1:
+            asyncio.ensure_future(self.send(self.batch_url, queued))
+        else:
+            for item in queued:
+                asyncio.ensure_future(self.send(self.url, [item]))
+
+    async def send(self, url, items):
+        payload = items[0][0] if len(items) == 1 and url == self.url else [order for order, _, _ in items]
+        loop = asyncio.get_running_loop()
+        try:
+            response = await loop.run_in_executor(
+                self.executor,
+                lambda: self.session.post(url, json=payload, timeout=self.timeout)
+            )
+        except Exception as e:
+            self.failed += len(items)
+            for _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        finished_at = time.monotonic()
+        for _, future, queued_at in items:
+            self.submitted += 1
+            self.latencies.append(finished_at - queued_at)
+            if not future.done():
+                future.set_result(response)
+
+    def stats(self):
+        """Orders sent, failures, orders/sec and latency percentiles in milliseconds"""
+        latencies = np.array(self.latencies) * 1000
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "submitted": self.submitted,
+            "failed": self.failed,
+            "orders_per_sec": self.submitted / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+            "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
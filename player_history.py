@@ -0,0 +1,78 @@
+import time
+from collections import deque
+import numpy as np
+
+class PriceRing:
+    """Fixed-capacity ring buffer of prices and their receive times in NumPy arrays"""
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.prices = np.empty(capacity)
+        self.times = np.empty(capacity)
+        self.head = 0  # Next slot to write
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, price, timestamp=None):
+        self.prices[self.head] = price
+        self.times[self.head] = time.time() if timestamp is None else timestamp
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _indices(self, n):
+        n = min(n, self.count)
+        return (self.head - n + np.arange(n)) % self.capacity
+
+    def last(self, n=1):
+        """The last n prices, oldest first"""
+        return self.prices[self._indices(n)]
+
+    def window(self, seconds, now=None):
+        """Prices received within the last `seconds`, oldest first"""
+        now = time.time() if now is None else now
+        indices = self._indices(self.count)
+        return self.prices[indices[self.times[indices] >= now - seconds]]
+
+class PlayerHistory:
+    """Bounded market and event history for one player
+
+    Prices go to a numeric ring buffer, events to a bounded deque, and only the
+    latest full market message is kept for building prompts.
+    """
+
+    def __init__(self, price_capacity=1024, event_capacity=32):
+        self.prices = PriceRing(price_capacity)
+        self.events = deque(maxlen=event_capacity)
+        self.latest_market = None
+
+    def add_market(self, data, timestamp=None):
+        self.latest_market = data
+        if data.get("price") is not None:
+            self.prices.append(float(data["price"]), timestamp)
+
+    def add_event(self, data):
+        self.events.append(data)
+
+    def last_events(self, n):
+        """The last n events, oldest first"""
+        return list(self.events)[-n:] if n else []
+
+    def last_prices(self, n):
+        return self.prices.last(n)
+
+    def price_window(self, seconds, now=None):
+        return self.prices.window(seconds, now)
+
+class HistoryStore(dict):
+    """Per-player histories, created on first access with the configured capacities"""
+
+    def __init__(self, price_capacity=1024, event_capacity=32):
+        super().__init__()
+        self.price_capacity = price_capacity
+        self.event_capacity = event_capacity
+
+    def __missing__(self, player):
+        history = self[player] = PlayerHistory(self.price_capacity, self.event_capacity)
+        return history
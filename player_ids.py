@@ -1,50 +1,20 @@
-import requests
+import argparse
 import json
 import csv
+from mlb_stats_client import StatsClient, add_client_arguments, client_from_args
 
-i = 0
-j = 0
 # Step 1: Fetch all active players
-def fetch_active_players():
-    global i 
-    url = "https://statsapi.mlb.com/api/v1/teams?season=2023&sportId=1"  # 2023 season, MLB (sportId=1)
-    response = requests.get(url)
-    
-    if response.status_code != 200:
-        print(f"Failed to fetch teams: {response.status_code}")
-        return []
-    
-    teams = response.json().get("teams", [])
-    active_players = []
-    
-    # Fetch roster for each team
-    for team in teams:
-        team_id = team.get("id")
-        roster_url = f"https://statsapi.mlb.com/api/v1/teams/{team_id}/roster/Active?season=2023"
-        roster_response = requests.get(roster_url)
-        
-        if roster_response.status_code == 200:
-            roster = roster_response.json().get("roster", [])
-            active_players.extend(roster)
-    print(i)
-    i += 1
-    return active_players
+def fetch_active_players(client=None):
+    client = client or StatsClient()
+    return client.fetch_active_players()
 
 # Step 2: Fetch player stats for active players
-def fetch_player_stats(player_id):
-    global j
-    url = f"https://statsapi.mlb.com/api/v1/people/{player_id}?hydrate=stats(group=[hitting,pitching,fielding],type=[yearByYear])"
-    response = requests.get(url)
-    print(j)
-    j += 1
-    if response.status_code == 200:
-        return response.json().get("people", [])[0]
-    else:
-        print(f"Failed to fetch stats for player {player_id}: {response.status_code}")
-        return None
+def fetch_player_stats(player_id, client=None):
+    client = client or StatsClient()
+    return client.fetch_player_stats(player_id)
 
 # Step 3: Extract relevant stats for fantasy game
-def extract_relevant_stats(player_data):
+def extract_relevant_stats(player_data, season="2023"):
     relevant_stats = {
         "id": player_data.get("id"),
         "fullName": player_data.get("fullName"),
@@ -57,7 +27,7 @@ def extract_relevant_stats(player_data):
     for stat_group in player_data.get("stats", []):
         if stat_group.get("group", {}).get("displayName") == "hitting":
             for split in stat_group.get("splits", []):
-                if split.get("season") == "2023":  # Only current season stats
+                if split.get("season") == season:  # Only current season stats
                     relevant_stats["stats"]["hitting"] = {
                         "homeRuns": split.get("stat", {}).get("homeRuns", 0),
                         "runsBattedIn": split.get("stat", {}).get("rbi", 0),
@@ -69,7 +39,7 @@ def extract_relevant_stats(player_data):
         # Extract pitching stats
         elif stat_group.get("group", {}).get("displayName") == "pitching":
             for split in stat_group.get("splits", []):
-                if split.get("season") == "2023":  # Only current season stats
+                if split.get("season") == season:  # Only current season stats
                     relevant_stats["stats"]["pitching"] = {
                         "wins": split.get("stat", {}).get("wins", 0),
                         "strikeouts": split.get("stat", {}).get("strikeOuts", 0),
@@ -123,15 +93,22 @@ def save_to_csv(data, filename="players_data.csv"):
 
 # Step 6: Main function to fetch and process data
 def main():
-    active_players = fetch_active_players()
+    parser = argparse.ArgumentParser(description="Scrape current-season stats for all active MLB players")
+    add_client_arguments(parser)
+    parser.add_argument("--season", default="2023", help="Season to scrape rosters and stats for")
+    args = parser.parse_args()
+    
+    client = client_from_args(args)
+    active_players, complete = fetch_active_players(client)
+    if not complete:
+        print("Could not fetch every roster, not overwriting the dataset")
+        return
+    player_ids = [player.get("person", {}).get("id") for player in active_players]
     fantasy_data = []
     
-    for player in active_players:
-        player_id = player.get("person", {}).get("id")
-        player_data = fetch_player_stats(player_id)
-        
+    for player_data in client.fetch_players_stats(player_ids):
         if player_data:
-            relevant_stats = extract_relevant_stats(player_data)
+            relevant_stats = extract_relevant_stats(player_data, args.season)
             fantasy_data.append(relevant_stats)
     
     # Save data to JSON and CSV files
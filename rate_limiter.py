@@ -0,0 +1,66 @@
+import threading
+import time
+
+def estimate_tokens(text):
+    """Rough token count of a prompt, about 4 characters per token"""
+    return len(text) // 4 + 1
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self, tokens=1):
+        """Take tokens, returning how long to wait before they may be used
+
+        Requests larger than the capacity are allowed and simply wait for a
+        full refill, so a long prompt is never rejected outright.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.refill(now)
+            self.tokens -= tokens
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def drain(self):
+        """Empty the bucket, e.g. after the server reports a rate limit"""
+        with self.lock:
+            self.refill(time.monotonic())
+            self.tokens = min(self.tokens, 0)
+
+class RateLimiter:
+    """Request and token quotas per minute, shared by concurrent workers
+
+    acquire() blocks until one request and the prompt's estimated tokens are
+    within both quotas. A quota of None is unlimited.
+    """
+
+    def __init__(self, requests_per_minute=60, tokens_per_minute=None):
+        self.requests = TokenBucket(requests_per_minute / 60, requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+        self.waited = 0.0
+
+    def acquire(self, tokens=0):
+        delay = 0.0
+        if self.requests:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens and tokens:
+            delay = max(delay, self.tokens.reserve(tokens))
+        if delay > 0:
+            self.waited += delay
+            time.sleep(delay)
+
+    def throttle(self):
+        """Back off after a rate-limit error: drop accumulated burst capacity"""
+        for bucket in (self.requests, self.tokens):
+            if bucket:
+                bucket.drain()
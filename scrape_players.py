@@ -0,0 +1,44 @@
+import argparse
+import player_ids
+import yearly_data
+from mlb_stats_client import add_client_arguments, client_from_args
+
+def build_datasets(player_payloads, season="2023", seasons=yearly_data.DEFAULT_SEASONS):
+    """Build the current-season and multi-season datasets from the same player payloads"""
+    current_data = []
+    yearly = []
+    for player_data in player_payloads:
+        if player_data:
+            current_data.append(player_ids.extract_relevant_stats(player_data, season))
+            yearly.append(yearly_data.extract_relevant_stats(player_data, seasons))
+    return current_data, yearly
+
+# Fetch every active player once and write both players_data.* and players_data_yearly.*
+def main():
+    parser = argparse.ArgumentParser(description="Scrape current-season and multi-season stats in a single pass")
+    add_client_arguments(parser)
+    parser.add_argument("--season", default="2023", help="Current season, used for rosters and players_data.*")
+    parser.add_argument("--years", type=int, default=5, help="Number of seasons in players_data_yearly.*")
+    args = parser.parse_args()
+
+    client = client_from_args(args)
+    active_players, complete = client.fetch_active_players()
+    if not complete:
+        print("Could not fetch every roster, not overwriting the datasets")
+        return
+    ids = [player.get("person", {}).get("id") for player in active_players]
+
+    current_data, yearly = build_datasets(
+        client.fetch_players_stats(ids),
+        args.season,
+        yearly_data.season_window(args.season, args.years)
+    )
+
+    player_ids.save_to_json(current_data)
+    player_ids.save_to_csv(current_data)
+    yearly_data.save_to_json(yearly)
+    yearly_data.save_to_csv(yearly)
+    print(f"Requests: {client.stats}")
+
+if __name__ == "__main__":
+    main()
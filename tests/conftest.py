@@ -0,0 +1,80 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+import pytest
+
+# The modules under test are top-level scripts in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class StandInServer:
+    """Local HTTP server replaying canned responses per path
+
+    Paths are matched after percent-decoding. Each path has a queue of (status, headers, body) responses; the last one
+    is repeated once the others are used up. Every request is recorded.
+    """
+
+    def __init__(self):
+        self.responses = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def respond(self, path, status=200, body=None, headers=None):
+        if not isinstance(body, (str, bytes)):
+            body = json.dumps(body)
+        with self.lock:
+            self.responses.setdefault(path, []).append((status, headers or {}, body))
+
+    def requests_to(self, path):
+        return [request for request in self.requests if request["path"] == path]
+
+    def next_response(self, path):
+        with self.lock:
+            queue = self.responses.get(path)
+            if not queue:
+                return 404, {}, "{}"
+            return queue.pop(0) if len(queue) > 1 else queue[0]
+
+    def handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle_request(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length) if length else b""
+                path = unquote(self.path)
+                with stand_in.lock:
+                    stand_in.requests.append(
+                        {"method": self.command, "path": path, "headers": dict(self.headers), "body": body}
+                    )
+                status, headers, response_body = stand_in.next_response(path)
+                response_body = response_body.encode() if isinstance(response_body, str) else response_body
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response_body)))
+                self.end_headers()
+                self.wfile.write(response_body)
+
+            do_GET = do_POST = handle_request
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+@pytest.fixture
+def stand_in_server():
+    server = StandInServer()
+    thread = threading.Thread(target=server.server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
@@ -0,0 +1,71 @@
+import asyncio
+import ai_agent
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    """Stands in for the Gemini model: answers after `delay` seconds and tracks concurrency"""
+
+    def __init__(self, delay, text='{"action":"hold","confidence":0.9}'):
+        self.delay = delay
+        self.text = text
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = []
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.calls.append((prompt, generation_config))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return FakeResponse(self.text)
+
+def use_model(monkeypatch, model, concurrency=4, timeout=5.0):
+    monkeypatch.setattr(ai_agent, "model", model)
+    monkeypatch.setattr(ai_agent, "LLM_TIMEOUT", timeout)
+    monkeypatch.setattr(ai_agent, "llm_semaphore", asyncio.Semaphore(concurrency))
+
+def test_analysis_does_not_block_the_event_loop(monkeypatch):
+    model = FakeModel(delay=0.2)
+    use_model(monkeypatch, model)
+
+    async def run():
+        ticks = 0
+
+        async def ingest():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ingestion = asyncio.ensure_future(ingest())
+        text = await ai_agent.ask_gemini("prompt", "player")
+        ingestion.cancel()
+        return text, ticks
+
+    text, ticks = asyncio.run(run())
+    assert text == model.text
+    assert ticks >= 10  # Ingestion kept running for the whole round trip
+
+def test_concurrent_requests_are_capped(monkeypatch):
+    model = FakeModel(delay=0.05)
+    use_model(monkeypatch, model, concurrency=2)
+
+    async def run():
+        return await asyncio.gather(*(ai_agent.ask_gemini(f"prompt {i}", i) for i in range(6)))
+
+    assert asyncio.run(run()) == [model.text] * 6
+    assert model.max_in_flight == 2
+
+def test_slow_requests_time_out(monkeypatch):
+    use_model(monkeypatch, FakeModel(delay=1.0), timeout=0.05)
+
+    async def run():
+        return await ai_agent.ask_gemini("prompt", "player")
+
+    assert asyncio.run(run()) is None
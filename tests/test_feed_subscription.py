@@ -0,0 +1,34 @@
+import json
+from feed_decoding import FeedDecoder
+from feed_subscription import Subscription
+
+ROSTER = [{"id": 641680, "fullName": "Jonah Heim", "position": "C"},
+          {"id": 642758, "fullName": "Domingo Acevedo", "position": "P"}]
+
+def tick(player, symbol):
+    return json.dumps({"type": "market_data", "data": {"player": player, "symbol": symbol, "price": 10.0}})
+
+def event(player):
+    return json.dumps({"type": "player_event", "data": {"player": player, "event_type": "hit", "description": "Single"}})
+
+def receive(subscription, raw):
+    record = FeedDecoder(prefilter=subscription.prefilter()).decode(raw)
+    return record is not None and subscription.matches(record)
+
+def test_symbols_resolve_to_player_names_through_the_roster():
+    subscription = Subscription(symbols=["JHEIC"]).with_roster(ROSTER)
+    assert subscription.players == {"Jonah Heim"}
+    assert receive(subscription, event("Jonah Heim"))
+    assert not receive(subscription, event("Domingo Acevedo"))
+
+def test_unresolved_symbols_learn_the_player_from_ticks():
+    subscription = Subscription(symbols=["HEIM"]).with_roster(ROSTER)
+    assert subscription.prefilter() is None
+    assert not receive(subscription, event("Jonah Heim"))
+    assert receive(subscription, tick("Jonah Heim", "HEIM"))
+    assert receive(subscription, event("Jonah Heim"))
+    assert not receive(subscription, event("Domingo Acevedo"))
+
+def test_ids_and_positions_resolve_for_the_prefilter():
+    subscription = Subscription(player_ids=[641680], positions=["P"]).with_roster(ROSTER)
+    assert subscription.prefilter() == ["641680", "642758", "Domingo Acevedo", "Jonah Heim"]
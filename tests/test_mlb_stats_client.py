@@ -0,0 +1,77 @@
+from mlb_stats_client import PLAYER_HYDRATE, ResponseCache, StatsClient
+
+def player_path(player_id):
+    return f"/people/{player_id}?hydrate={PLAYER_HYDRATE}"
+
+def player(player_id):
+    return {"people": [{"id": player_id, "fullName": f"Player {player_id}"}]}
+
+def make_client(server, **options):
+    return StatsClient(base_url=server.url, concurrency=4, backoff_factor=0, timeout=5, **options)
+
+def test_retries_rate_limits_and_server_errors(stand_in_server):
+    path = player_path(1)
+    stand_in_server.respond(path, 429, {}, {"Retry-After": "0"})
+    stand_in_server.respond(path, 503, {})
+    stand_in_server.respond(path, 200, player(1))
+
+    assert make_client(stand_in_server).fetch_player_stats(1)["id"] == 1
+    assert len(stand_in_server.requests_to(path)) == 3
+
+def test_gives_up_after_retries(stand_in_server):
+    path = player_path(1)
+    stand_in_server.respond(path, 500, {})
+
+    assert make_client(stand_in_server, retries=2).fetch_player_stats(1) is None
+    assert len(stand_in_server.requests_to(path)) == 3
+
+def test_fetches_rosters_and_players_concurrently(stand_in_server):
+    stand_in_server.respond("/teams?season=2023&sportId=1", body={"teams": [{"id": 10}, {"id": 20}]})
+    stand_in_server.respond("/teams/10/roster/Active?season=2023", body={"roster": [{"person": {"id": 1}}]})
+    stand_in_server.respond("/teams/20/roster/Active?season=2023", body={"roster": [{"person": {"id": 2}}]})
+    for player_id in (1, 2):
+        stand_in_server.respond(player_path(player_id), body=player(player_id))
+
+    client = make_client(stand_in_server)
+    active, complete = client.fetch_active_players()
+    player_ids = [entry["person"]["id"] for entry in active]
+    assert complete
+    assert sorted(player_ids) == [1, 2]
+    assert {entry["team"]["id"] for entry in active} == {10, 20}
+    assert [data["id"] for data in client.fetch_players_stats(player_ids)] == player_ids
+
+def test_failed_roster_marks_the_active_players_incomplete(stand_in_server):
+    stand_in_server.respond("/teams?season=2023&sportId=1", body={"teams": [{"id": 10}, {"id": 20}]})
+    stand_in_server.respond("/teams/10/roster/Active?season=2023", body={"roster": [{"person": {"id": 1}}]})
+    stand_in_server.respond("/teams/20/roster/Active?season=2023", 500, {})
+
+    active, complete = make_client(stand_in_server, retries=0).fetch_active_players()
+    assert [entry["person"]["id"] for entry in active] == [1]
+    assert not complete
+
+def test_cache_serves_fresh_entries_and_revalidates_stale_ones(stand_in_server, tmp_path):
+    path = player_path(1)
+    stand_in_server.respond(path, 200, player(1), {"ETag": '"v1"'})
+    stand_in_server.respond(path, 304, "")
+
+    client = make_client(stand_in_server, cache=ResponseCache(tmp_path, ttls={"people": 3600}))
+    assert client.fetch_player_stats(1)["id"] == 1
+    assert client.fetch_player_stats(1)["id"] == 1
+    assert len(stand_in_server.requests_to(path)) == 1
+
+    stale = make_client(stand_in_server, cache=ResponseCache(tmp_path, ttls={"people": 0}))
+    assert stale.fetch_player_stats(1)["id"] == 1
+    requests = stand_in_server.requests_to(path)
+    assert len(requests) == 2
+    assert requests[1]["headers"]["If-None-Match"] == '"v1"'
+    assert stale.stats == {"cached": 0, "revalidated": 1, "downloaded": 0}
+
+def test_offline_client_serves_only_the_cache(stand_in_server, tmp_path):
+    stand_in_server.respond(player_path(1), body=player(1))
+    cache = ResponseCache(tmp_path)
+    make_client(stand_in_server, cache=cache).fetch_player_stats(1)
+
+    offline = make_client(stand_in_server, cache=cache, offline=True)
+    assert offline.fetch_player_stats(1)["id"] == 1
+    assert offline.fetch_player_stats(2) is None
+    assert len(stand_in_server.requests) == 1
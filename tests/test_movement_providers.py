@@ -0,0 +1,97 @@
+import threading
+import pytest
+from google.api_core.exceptions import ResourceExhausted
+from movement_providers import MovementProvider, StatisticalMovementProvider, generate_all_movements, plan_batches
+from rate_limiter import RateLimiter
+
+def make_players(count):
+    return [{"fullName": f"Player {i}", "position": "P", "stats": {}} for i in range(count)]
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    """Answers each batch prompt with one movement per player: 1% for Player 1, 2% for Player 2, ...
+
+    Prompts mentioning a player in `bad` get an unparseable reply, and the
+    first `rate_limits` calls raise a rate-limit error.
+    """
+
+    def __init__(self, bad=(), rate_limits=0):
+        self.bad = set(bad)
+        self.rate_limits = rate_limits
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self.lock:
+            self.calls += 1
+            if self.rate_limits:
+                self.rate_limits -= 1
+                raise ResourceExhausted("quota exceeded")
+        numbers = [int(part.split(". Player ", 1)[1].split(" ", 1)[0]) for part in prompt.split("'")
+                   if ". Player " in part]
+        if self.bad & set(numbers):
+            return FakeResponse("sorry, I can't help with that")
+        return FakeResponse(", ".join(f"{number % 5}%" for number in numbers))
+
+def expected(players):
+    return [float(i % 5) for i in range(len(players))]
+
+def test_movements_align_with_players():
+    players = make_players(45)
+    model = FakeModel()
+    movements = generate_all_movements(players, model, RateLimiter(None), concurrency=4, max_batch_size=10)
+    assert movements == expected(players)
+    assert model.calls == 5
+
+def test_failed_batch_is_split_instead_of_zero_filled(capsys):
+    players = make_players(16)
+    model = FakeModel(bad={5})
+    movements = generate_all_movements(players, model, RateLimiter(None), max_batch_size=8, max_attempts=2)
+
+    # Only the player whose response can never be parsed falls back to 0%
+    assert movements == [0.0 if i == 5 else m for i, m in enumerate(expected(players))]
+    assert "'requests': 9, 'splits': 3, 'failed': 1" in capsys.readouterr().out
+
+def test_rate_limited_batches_back_off_and_retry():
+    players = make_players(6)
+    limiter = RateLimiter(requests_per_minute=6000)
+    model = FakeModel(rate_limits=2)
+    movements = generate_all_movements(players, model, limiter, concurrency=1, max_batch_size=2)
+
+    assert movements == expected(players)
+    assert model.calls == 5
+    assert limiter.waited > 0  # Throttling emptied the bucket, so later requests waited for tokens
+
+def test_batches_respect_the_prompt_limit():
+    players = make_players(30)
+    batches = plan_batches(players, max_batch_size=20, max_prompt_chars=600)
+    assert [player for batch in batches for player in batch] == players
+    assert all(len(batch) <= 20 for batch in batches)
+    assert len(batches) > 2
+
+def test_offline_impacts_and_sentiment_follow_the_headline():
+    players = [{"player_id": i, "name": f"Player {i}", "position": position, "daily_movement": "+2.00%"}
+               for i, position in enumerate(["P", "SS", "CF"] * 20)]
+    provider = StatisticalMovementProvider(seed=7)
+
+    for events in provider.intraday_events(players):
+        for event in events:
+            if "injured list" in event["event"] or "no-hitter" in event["event"]:
+                assert (event["impact"] < 0) == ("injured list" in event["event"])
+    for news in provider.news_events(players):
+        for item in news:
+            if "velocity" in item["headline"]:
+                assert item["sentiment"] != "negative"
+            if any(bad in item["headline"] for bad in ("struggles with control", "throwing error", "misjudges")):
+                assert item["sentiment"] != "positive"
+
+def test_incomplete_providers_fail_on_creation():
+    class DailyOnly(MovementProvider):
+        def daily_movements(self, players_data):
+            return []
+
+    with pytest.raises(TypeError):
+        DailyOnly()
@@ -0,0 +1,55 @@
+import asyncio
+import json
+import pytest
+from order_client import OrderClient
+
+ORDER = {"symbol": "JHEIM", "order_type": "market", "side": "buy", "quantity": 1, "price": None, "username": "agent1"}
+
+def make_client(server, **options):
+    return OrderClient(url=f"{server.url}/order", timeout=5, backoff_factor=0, **options)
+
+def submit(client, *orders):
+    async def run():
+        return await asyncio.gather(*(client.submit(order) for order in orders))
+    try:
+        return asyncio.run(run())
+    finally:
+        client.close()
+
+def test_retries_unavailable_server(stand_in_server):
+    stand_in_server.respond("/order", 503, {})
+    stand_in_server.respond("/order", 201, {"id": 1})
+
+    [response] = submit(make_client(stand_in_server), ORDER)
+    assert response.status_code == 201
+    assert len(stand_in_server.requests_to("/order")) == 2
+
+@pytest.mark.parametrize("status", [500, 502, 504])
+def test_does_not_retry_when_the_order_may_have_been_accepted(stand_in_server, status):
+    stand_in_server.respond("/order", status, {})
+    stand_in_server.respond("/order", 201, {"id": 1})
+
+    [response] = submit(make_client(stand_in_server), ORDER)
+    assert response.status_code == status
+    assert len(stand_in_server.requests_to("/order")) == 1
+
+def test_same_tick_orders_are_batched(stand_in_server):
+    stand_in_server.respond("/orders", 201, [{"id": 1}, {"id": 2}])
+    client = make_client(stand_in_server, batch_url=f"{stand_in_server.url}/orders")
+    sell = {**ORDER, "side": "sell"}
+
+    responses = submit(client, ORDER, sell)
+    assert [response.status_code for response in responses] == [201, 201]
+    [request] = stand_in_server.requests_to("/orders")
+    assert json.loads(request["body"]) == [ORDER, sell]
+    assert client.stats()["submitted"] == 2
+
+def test_orders_are_sent_individually_without_a_batch_url(stand_in_server):
+    stand_in_server.respond("/order", 201, {"id": 1})
+    client = make_client(stand_in_server)
+
+    submit(client, *[ORDER] * 5)
+    assert [json.loads(request["body"]) for request in stand_in_server.requests_to("/order")] == [ORDER] * 5
+    stats = client.stats()
+    assert stats["submitted"] == 5 and stats["failed"] == 0
+    assert stats["p99_ms"] >= stats["p50_ms"] > 0
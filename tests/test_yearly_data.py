@@ -0,0 +1,55 @@
+import time
+from yearly_data import incremental_update
+
+def roster_entry(player_id, team="Texas Rangers", position="C"):
+    return {"person": {"id": player_id}, "position": {"abbreviation": position}, "team": {"name": team}}
+
+def record(player_id, team="Texas Rangers", position="C"):
+    return {"id": player_id, "fullName": f"Player {player_id}", "position": position, "team": team, "stats": {}}
+
+def payload(player_id, team="Texas Rangers", position="C"):
+    return {"id": player_id, "fullName": f"Player {player_id}", "primaryPosition": {"abbreviation": position},
+            "currentTeam": {"name": team}, "stats": []}
+
+class FakeClient:
+    def __init__(self, payloads):
+        self.payloads = payloads
+        self.fetched = []
+
+    def fetch_players_stats(self, player_ids):
+        self.fetched.extend(player_ids)
+        return [self.payloads.get(player_id) for player_id in player_ids]
+
+def test_refuses_to_drop_most_stored_players():
+    previous = {player_id: record(player_id) for player_id in range(1, 11)}
+    client = FakeClient({})
+
+    assert incremental_update(client, [], previous, {}) is None
+    assert incremental_update(client, [roster_entry(1)], previous, {}) is None
+    assert client.fetched == []
+
+def test_refetches_players_who_moved_and_keeps_state_of_the_rest():
+    now = time.time()
+    previous = {player_id: record(player_id) for player_id in range(1, 11)}
+    state = {player_id: now for player_id in range(1, 11)}
+    roster = [roster_entry(player_id) for player_id in range(1, 10)]
+    roster[0] = roster_entry(1, team="Seattle Mariners")
+    roster[1] = roster_entry(2, position="1B")
+    client = FakeClient({1: payload(1, team="Seattle Mariners"), 2: payload(2, position="1B")})
+
+    merged, changed, removed, new_state = incremental_update(client, roster, previous, state)
+    assert client.fetched == [1, 2]
+    assert [player["id"] for player in changed] == [1, 2]
+    assert merged[0]["team"] == "Seattle Mariners" and merged[1]["position"] == "1B"
+    assert removed == [10]
+    assert sorted(new_state) == list(range(1, 10))
+
+def test_revalidate_refetches_every_player():
+    now = time.time()
+    previous = {1: record(1), 2: record(2)}
+    client = FakeClient({1: payload(1), 2: payload(2)})
+
+    _, changed, _, _ = incremental_update(client, [roster_entry(1), roster_entry(2)], previous, {1: now, 2: now},
+                                          revalidate=True)
+    assert client.fetched == [1, 2]
+    assert changed == []
@@ -0,0 +1,174 @@
+import json
+import math
+
+ACTIONS = ("buy", "sell", "hold")
+ORDER_TYPES = ("market", "limit")
+MAX_QUANTITY = 10000
+
+# Response schema for Gemini's JSON mode; parse_decision enforces the same rules
+DECISION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action": {"type": "string", "enum": list(ACTIONS)},
+        "order_type": {"type": "string", "enum": list(ORDER_TYPES)},
+        "quantity": {"type": "integer"},
+        "limit_price": {"type": "number", "nullable": True},
+        "confidence": {"type": "number"}
+    },
+    "required": ["action", "order_type", "quantity", "limit_price", "confidence"]
+}
+
+DECISION_CONFIG = {"response_mime_type": "application/json", "response_schema": DECISION_SCHEMA}
+
+# Model families that accept response_mime_type/response_schema; older models such as gemini-pro reject them
+JSON_MODE_MODELS = ("gemini-1.5-", "gemini-2")
+
+# Several players per request: one decision object per player, tagged with the player's name
+BATCH_DECISION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "decisions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"player": {"type": "string"}, **DECISION_SCHEMA["properties"]},
+                "required": ["player", *DECISION_SCHEMA["required"]]
+            }
+        }
+    },
+    "required": ["decisions"]
+}
+
+BATCH_DECISION_CONFIG = {"response_mime_type": "application/json", "response_schema": BATCH_DECISION_SCHEMA}
+
+DECISION_FORMAT = (
+    '"action":"buy"|"sell"|"hold","order_type":"market"|"limit",'
+    f'"quantity":1-{MAX_QUANTITY},"limit_price":number or null,"confidence":0-1'
+)
+
+class DecisionError(ValueError):
+    """The model's response is not a valid trading decision"""
+
+def supports_json_mode(model_name):
+    return model_name.removeprefix("models/").startswith(JSON_MODE_MODELS)
+
+def compact_json(value):
+    return json.dumps(value, separators=(",", ":"))
+
+def build_prompt(player, events, market_data):
+    """Short prompt asking for a single JSON decision"""
+    return (
+        f"You trade shares of baseball player {player}. Decide from the recent events and latest market data.\n"
+        f"Events: {compact_json(events)}\n"
+        f"Market: {compact_json(market_data)}\n"
+        f"Reply with only JSON: {{{DECISION_FORMAT}}}. "
+        "limit_price is required for limit orders and null for market orders."
+    )
+
+def build_batch_prompt(inputs):
+    """Short prompt asking for one JSON decision per player
+
+    inputs maps each player to its (events, market_data).
+    """
+    players = [{"player": player, "events": events, "market": market_data}
+               for player, (events, market_data) in inputs.items()]
+    return (
+        "You trade shares of baseball players. For each player, decide from their recent events and latest "
+        "market data.\n"
+        f"Players: {compact_json(players)}\n"
+        f'Reply with only JSON: {{"decisions":[{{"player":name,{DECISION_FORMAT}}}]}} with one entry per player. '
+        "limit_price is required for limit orders and null for market orders."
+    )
+
+def strip_code_fence(text):
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return text.strip()
+
+def is_number(value):
+    """A finite JSON number; NaN and Infinity are rejected"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+def validate_decision(decision):
+    """Check a decoded decision against the schema and return it normalized
+
+    Hold decisions are returned with quantity 0 and no price, market orders
+    with limit_price set to None. Raises DecisionError on any violation.
+    """
+    if not isinstance(decision, dict):
+        raise DecisionError(f"expected a JSON object, got {type(decision).__name__}")
+
+    action = decision.get("action")
+    if action not in ACTIONS:
+        raise DecisionError(f"invalid action {action!r}")
+    confidence = decision.get("confidence")
+    if not is_number(confidence) or not 0 <= confidence <= 1:
+        raise DecisionError(f"invalid confidence {confidence!r}")
+    if action == "hold":
+        return {"action": "hold", "order_type": None, "quantity": 0, "limit_price": None,
+                "confidence": float(confidence)}
+
+    order_type = decision.get("order_type")
+    if order_type not in ORDER_TYPES:
+        raise DecisionError(f"invalid order_type {order_type!r}")
+    quantity = decision.get("quantity")
+    if is_number(quantity) and float(quantity).is_integer():
+        quantity = int(quantity)
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or not 1 <= quantity <= MAX_QUANTITY:
+        raise DecisionError(f"invalid quantity {quantity!r}")
+    limit_price = decision.get("limit_price")
+    if order_type == "limit":
+        if not is_number(limit_price) or limit_price <= 0:
+            raise DecisionError(f"limit order needs a positive limit_price, got {limit_price!r}")
+        limit_price = float(limit_price)
+    else:
+        limit_price = None
+
+    return {"action": action, "order_type": order_type, "quantity": quantity, "limit_price": limit_price,
+            "confidence": float(confidence)}
+
+def parse_decision(text):
+    """Parse and validate a JSON decision from the model's response text"""
+    try:
+        decision = json.loads(strip_code_fence(text))
+    except ValueError as e:
+        raise DecisionError(f"response is not JSON: {e}") from None
+    return validate_decision(decision)
+
+def parse_batch_decisions(text, players):
+    """Parse a batched response into per-player decisions
+
+    Returns (decisions, errors): validated decisions by player, and a
+    DecisionError for each requested player whose entry is missing,
+    duplicated or invalid. Entries for players that were not asked about
+    are ignored. Raises DecisionError if the response as a whole is
+    malformed.
+    """
+    try:
+        response = json.loads(strip_code_fence(text))
+    except ValueError as e:
+        raise DecisionError(f"response is not JSON: {e}") from None
+    entries = response.get("decisions") if isinstance(response, dict) else None
+    if not isinstance(entries, list):
+        raise DecisionError("response has no decisions list")
+
+    requested = set(players)
+    decisions, errors = {}, {}
+    for entry in entries:
+        player = entry.get("player") if isinstance(entry, dict) else None
+        if player not in requested:
+            continue
+        if player in decisions or player in errors:
+            decisions.pop(player, None)
+            errors[player] = DecisionError("more than one decision")
+            continue
+        try:
+            decisions[player] = validate_decision(entry)
+        except DecisionError as e:
+            errors[player] = e
+    for player in players:
+        if player not in decisions and player not in errors:
+            errors[player] = DecisionError("no decision in response")
+    return decisions, errors
@@ -0,0 +1,132 @@
+import json
+import numpy as np
+import pandas as pd
+
+# Stats used by the price formulas, with the value assumed when a season lacks one or it is unparseable
+STAT_DEFAULTS = {
+    "earnedRunAverage": 5.00,
+    "walksAndHitsPerInning": 1.50,
+    "strikeouts": 0.0,
+    "battingAverage": 0.200,
+    "homeRuns": 0.0,
+    "runsBattedIn": 0.0
+}
+
+# Linear price formulas: intercept plus a coefficient per stat
+PITCHER_PARAMS = {
+    "intercept": 150.0,
+    "earnedRunAverage": -5.0,  # Lower ERA = higher value
+    "strikeouts": 0.5,  # More strikeouts = higher value
+    "walksAndHitsPerInning": -20.0  # Lower WHIP = higher value
+}
+BATTER_PARAMS = {
+    "intercept": 0.0,
+    "battingAverage": 300.0,  # Higher average = higher value
+    "homeRuns": 5.0,  # More home runs = higher value
+    "runsBattedIn": 1.0  # More RBIs = higher value
+}
+
+DEFAULT_SEASON_WEIGHTS = {"2023": 1.0}
+NO_STATS_PRICE = 10.0  # Base price for players with no stats in the weighted seasons
+MIN_PRICE = 1.0
+
+def decay_weights(seasons, decay=0.5):
+    """Season weights halving (by default) for each season before the latest"""
+    ordered = sorted(seasons, reverse=True)
+    return {season: decay ** age for age, season in enumerate(ordered)}
+
+class StatsTable:
+    """Player stats as typed arrays, one row per player and one column per season
+
+    Each stat is a float array with NaN where the player has no value for
+    that season; has_season marks the seasons a player has any stats for.
+    String stats such as ".236" or "3.27" are parsed once when the table is
+    built, and unparseable values ("-.--") become NaN.
+    """
+
+    def __init__(self, ids, names, positions, seasons, has_season, stats):
+        self.ids = ids
+        self.names = names
+        self.positions = positions
+        self.is_pitcher = positions == "P"
+        self.seasons = seasons
+        self.has_season = has_season
+        self.stats = stats
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_players(cls, players, columns=tuple(STAT_DEFAULTS)):
+        """Build from players_data_yearly records (id, fullName, position, stats by season)"""
+        seasons = sorted({season for player in players for season in player.get("stats", {})})
+        season_index = {season: i for i, season in enumerate(seasons)}
+        rows, cols = [], []
+        raw = {column: [] for column in columns}
+        for i, player in enumerate(players):
+            for season, stats in player.get("stats", {}).items():
+                rows.append(i)
+                cols.append(season_index[season])
+                for column in columns:
+                    raw[column].append(stats.get(column))
+
+        shape = (len(players), len(seasons))
+        has_season = np.zeros(shape, dtype=bool)
+        has_season[rows, cols] = True
+        stats = {}
+        for column in columns:
+            values = np.full(shape, np.nan)
+            values[rows, cols] = pd.to_numeric(pd.Series(raw[column], dtype=object), errors="coerce").to_numpy(float)
+            stats[column] = values
+
+        return cls(
+            np.array([player.get("id") for player in players]),
+            np.array([player.get("fullName") for player in players], dtype=object),
+            np.array([player.get("position") for player in players], dtype=object),
+            seasons,
+            has_season,
+            stats
+        )
+
+    @classmethod
+    def load(cls, filename="players_data_yearly.json"):
+        with open(filename) as f:
+            return cls.from_players(json.load(f))
+
+    def weighted_stats(self, season_weights):
+        """Per-player weighted average of each stat over the seasons they have
+
+        Returns the stats and a mask of players with any weighted season.
+        Seasons missing from season_weights get weight 0.
+        """
+        weights = np.array([season_weights.get(season, 0.0) for season in self.seasons])
+        player_weights = self.has_season * weights
+        totals = player_weights.sum(axis=1)
+        has_stats = totals > 0
+        averages = {}
+        for column, values in self.stats.items():
+            filled = np.where(np.isnan(values), STAT_DEFAULTS.get(column, 0.0), values)
+            averages[column] = np.divide(
+                (filled * player_weights).sum(axis=1), totals,
+                out=np.zeros(len(self)), where=has_stats
+            )
+        return averages, has_stats
+
+def linear_price(stats, params):
+    price = np.full(len(next(iter(stats.values()))), params.get("intercept", 0.0))
+    for column, coefficient in params.items():
+        if column != "intercept":
+            price += coefficient * stats[column]
+    return price
+
+def base_prices(table, season_weights=DEFAULT_SEASON_WEIGHTS, pitcher_params=PITCHER_PARAMS,
+                batter_params=BATTER_PARAMS):
+    """Base price of every player in the table, aligned with table.ids
+
+    Pitchers use pitcher_params and everyone else batter_params, applied to
+    their season_weights-weighted stats. Players without stats in any
+    weighted season get NO_STATS_PRICE; prices never go below MIN_PRICE.
+    """
+    stats, has_stats = table.weighted_stats(season_weights)
+    prices = np.where(table.is_pitcher, linear_price(stats, pitcher_params), linear_price(stats, batter_params))
+    return np.where(has_stats, np.maximum(MIN_PRICE, prices), NO_STATS_PRICE)
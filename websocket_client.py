@@ -1,33 +1,32 @@
-import websockets
+import argparse
 import asyncio
-import json
+from feed_connection import STREAM_URIS, FeedConnection
+from feed_subscription import Subscription, load_roster
 
-async def market_data_listener():
-    uri = "ws://localhost:3030/ws/market"
-    
-    async with websockets.connect(uri) as websocket:
-        print(f"Connected to {uri}")
-        try:
-            while True:
-                message = await websocket.recv()
-                if message.__contains__("Jonah"):
-                    print(message)
-        except websockets.exceptions.ConnectionClosed:
-            print("Connection closed")
+async def market_data_listener(subscription):
+    await FeedConnection(STREAM_URIS["market"], print, subscription=subscription).run()
 
-async def event_data_listener():
-    uri = "ws://localhost:3030/ws/events"
-    
-    async with websockets.connect(uri) as websocket:
-        print(f"Connected to {uri}")
-        try:
-            while True:
-                message = await websocket.recv()
-                if message.__contains__("Jonah"):
-                    print(message)
-        except websockets.exceptions.ConnectionClosed:
-            print("Connection closed")
+async def event_data_listener(subscription):
+    await FeedConnection(STREAM_URIS["events"], print, subscription=subscription).run()
+
+def parse_subscription():
+    parser = argparse.ArgumentParser(description="Print feed messages for watched players")
+    parser.add_argument("--symbol", action="append", default=[], help="Symbol to watch (repeatable)")
+    parser.add_argument("--player", action="append", default=[], help="Player name to watch (repeatable)")
+    parser.add_argument("--player-id", action="append", default=[], help="Player ID to watch (repeatable)")
+    parser.add_argument("--position", action="append", default=[], help="Position to watch (repeatable)")
+    parser.add_argument("--events", action="store_true", help="Listen to the events feed instead of market data")
+    args = parser.parse_args()
+
+    players = args.player
+    if not (args.symbol or players or args.player_id or args.position):
+        players = ["Jonah Bride", "Jonah Heim"]
+    subscription = Subscription(args.symbol, players, args.player_id, args.position)
+    if args.symbol or args.player_id or args.position:
+        subscription = subscription.with_roster(load_roster())
+    return subscription, args.events
 
 if __name__ == "__main__":
-    asyncio.get_event_loop().run_until_complete(market_data_listener()) 
-    # asyncio.get_event_loop().run_until_complete(event_data_listener())
\ No newline at end of file
+    subscription, events = parse_subscription()
+    listener = event_data_listener if events else market_data_listener
+    asyncio.get_event_loop().run_until_complete(listener(subscription))
@@ -1,40 +1,50 @@
 import asyncio
-import json
-import websockets
 import datetime
+from feed_connection import FEED_URI, FeedConnection
+from feed_decoding import MarketTick, NewsEvent
+from feed_subscription import Subscription
 
 class TradingClient:
-    def __init__(self, uri="ws://localhost:3030/ws"):
+    def __init__(self, uri=FEED_URI, subscription=None, server_side_filter=False, **options):
         self.uri = uri
         self.market_data = {}
         self.news_events = []
+        self.connection = FeedConnection(
+            uri, self.handle_message, subscription=subscription or Subscription(),
+            server_side_filter=server_side_filter, **options
+        )
 
-    async def connect(self):
-        """Connect to the WebSocket server and handle messages."""
-        async with websockets.connect(self.uri) as websocket:
-            print(f"Connected to {self.uri}")
-            try:
-                while True:
-                    message = await websocket.recv()
-                    await self.handle_message(json.loads(message))
-            except websockets.exceptions.ConnectionClosed:
-                print("Connection closed")
+    @property
+    def subscription(self):
+        return self.connection.subscription
+
+    async def subscribe(self, symbols=(), players=(), player_ids=(), positions=(), roster=None):
+        """Receive only messages for these symbols, players, player IDs or positions (all when empty).
 
-    async def handle_message(self, message):
-        """Handle different types of messages."""
-        msg_type = message.get('type')
-        data = message.get('data')
+        A roster (player records with id, fullName and position) resolves symbols, IDs and positions to
+        names so unwatched messages are skipped before decoding.
+        """
+        subscription = Subscription(symbols, players, player_ids, positions)
+        if roster is not None:
+            subscription = subscription.with_roster(roster)
+        await self.connection.subscribe(subscription)
+
+    async def connect(self):
+        """Connect to the WebSocket server and handle messages, reconnecting and resuming on disconnect."""
+        await self.connection.run()
 
-        if msg_type == 'market_data':
-            await self.handle_market_data(data)
-        elif msg_type == 'news_event':
-            await self.handle_news_event(data)
+    async def handle_message(self, record):
+        """Handle different types of decoded messages."""
+        if isinstance(record, MarketTick):
+            await self.handle_market_data(record)
+        elif isinstance(record, NewsEvent):
+            await self.handle_news_event(record)
 
-    async def handle_market_data(self, data):
+    async def handle_market_data(self, tick):
         """Process market data updates."""
-        symbol = data.get('symbol')
-        price = data.get('price')
-        timestamp = data.get('timestamp')
+        symbol = tick.symbol
+        price = tick.price
+        timestamp = tick.timestamp
         
         self.market_data[symbol] = {
             'price': price,
@@ -44,13 +54,13 @@ class TradingClient:
         
         print(f"Market Data: {symbol} @ ${price:.2f} ({timestamp})")
 
-    async def handle_news_event(self, data):
+    async def handle_news_event(self, news):
         """Process news event updates."""
         event = {
-            'player_id': data.get('player_id'),
-            'event_type': data.get('event_type'),
-            'description': data.get('description'),
-            'timestamp': data.get('timestamp'),
+            'player_id': news.player_id,
+            'event_type': news.event_type,
+            'description': news.description,
+            'timestamp': news.timestamp,
             'received_at': datetime.datetime.now().isoformat()
         }
         
@@ -1,44 +1,28 @@
-import requests
+import argparse
 import json
 import csv
+import os
+import time
+from mlb_stats_client import StatsClient, add_client_arguments, client_from_args
+
+DEFAULT_SEASONS = ["2023", "2022", "2021", "2020", "2019"]
+
+def season_window(last_season, years=5):
+    """The last `years` seasons up to and including last_season, most recent first"""
+    return [str(int(last_season) - offset) for offset in range(years)]
 
 # Step 1: Fetch all active players
-def fetch_active_players():
-    url = "https://statsapi.mlb.com/api/v1/teams?season=2023&sportId=1"  # 2023 season, MLB (sportId=1)
-    response = requests.get(url)
-    
-    if response.status_code != 200:
-        print(f"Failed to fetch teams: {response.status_code}")
-        return []
-    
-    teams = response.json().get("teams", [])
-    active_players = []
-    
-    # Fetch roster for each team
-    for team in teams:
-        team_id = team.get("id")
-        roster_url = f"https://statsapi.mlb.com/api/v1/teams/{team_id}/roster/Active?season=2023"
-        roster_response = requests.get(roster_url)
-        
-        if roster_response.status_code == 200:
-            roster = roster_response.json().get("roster", [])
-            active_players.extend(roster)
-    
-    return active_players
+def fetch_active_players(client=None):
+    client = client or StatsClient()
+    return client.fetch_active_players()
 
 # Step 2: Fetch player stats for active players
-def fetch_player_stats(player_id):
-    url = f"https://statsapi.mlb.com/api/v1/people/{player_id}?hydrate=stats(group=[hitting,pitching,fielding],type=[yearByYear])"
-    response = requests.get(url)
-    
-    if response.status_code == 200:
-        return response.json().get("people", [])[0]
-    else:
-        print(f"Failed to fetch stats for player {player_id}: {response.status_code}")
-        return None
+def fetch_player_stats(player_id, client=None):
+    client = client or StatsClient()
+    return client.fetch_player_stats(player_id)
 
-# Step 3: Extract relevant stats for the last five years
-def extract_relevant_stats(player_data):
+# Step 3: Extract relevant stats for the given seasons (the last five years by default)
+def extract_relevant_stats(player_data, seasons=DEFAULT_SEASONS):
     relevant_stats = {
         "id": player_data.get("id"),
         "fullName": player_data.get("fullName"),
@@ -51,7 +35,7 @@ def extract_relevant_stats(player_data):
     for stat_group in player_data.get("stats", []):
         if stat_group.get("group", {}).get("displayName") == "hitting":
             for split in stat_group.get("splits", []):
-                if split.get("season") in ["2023", "2022", "2021", "2020", "2019"]:  # Last five years
+                if split.get("season") in seasons:
                     season = split.get("season")
                     relevant_stats["stats"][season] = {
                         "homeRuns": split.get("stat", {}).get("homeRuns", 0),
@@ -64,7 +48,7 @@ def extract_relevant_stats(player_data):
         # Extract pitching stats
         elif stat_group.get("group", {}).get("displayName") == "pitching":
             for split in stat_group.get("splits", []):
-                if split.get("season") in ["2023", "2022", "2021", "2020", "2019"]:  # Last five years
+                if split.get("season") in seasons:
                     season = split.get("season")
                     relevant_stats["stats"][season] = {
                         "wins": split.get("stat", {}).get("wins", 0),
@@ -119,17 +103,158 @@ def save_to_csv(data, filename="players_data_yearly.csv"):
         writer.writerows(rows)
     print(f"Data saved to {filename}")
 
+# Incremental refresh: only refetch new, moved or stale players and merge them into the previous dataset
+def load_previous(filename="players_data_yearly.json"):
+    """Previous dataset as a dict keyed by player id (empty if there is none)"""
+    if not os.path.exists(filename):
+        return {}
+    with open(filename) as f:
+        return {player["id"]: player for player in json.load(f)}
+
+def load_state(filename="players_data_yearly.state.json"):
+    """When each player was last fetched, keyed by player id"""
+    if not os.path.exists(filename):
+        return {}
+    with open(filename) as f:
+        return {int(player_id): fetched_at for player_id, fetched_at in json.load(f).items()}
+
+# Players are refetched at least about once a week, so a daily run touches roughly a fifth of the roster
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+def stale_after(player_id, max_age):
+    """Age at which a player is refetched, spread over [max_age / 2, max_age)
+
+    The spread is fixed per player, so players fetched together (e.g. by
+    the first incremental run) come due on different days instead of all at
+    once every max_age.
+    """
+    return max_age * (0.5 + (player_id % 100) / 200)
+
+# An incremental update that would drop more than this fraction of the stored players is refused:
+# that is far more likely a bad roster response than real roster moves
+MAX_REMOVED_FRACTION = 0.1
+
+def roster_changed(record, roster_entry):
+    """Whether today's roster lists a stored player on another team or at another position"""
+    return (
+        record.get("team") != roster_entry.get("team", {}).get("name")
+        or record.get("position") != roster_entry.get("position", {}).get("abbreviation")
+    )
+
+def incremental_update(client, active_players, previous, state, seasons=DEFAULT_SEASONS, max_age=DEFAULT_MAX_AGE,
+                       revalidate=False, max_removed=MAX_REMOVED_FRACTION):
+    """Fetch only new, moved and stale players and merge them into the previous dataset
+
+    active_players are the roster entries from a complete
+    StatsClient.fetch_active_players. A player is refetched when they are
+    new, when the roster shows a different team or position than the stored
+    record, or when they were not fetched within their share of max_age
+    seconds. With revalidate every active player is refetched, relying on the
+    client's response cache to make unchanged players cost a 304.
+
+    Returns the merged dataset in roster order, the records that are new or
+    changed, the ids no longer on an active roster and the updated state.
+    Players whose fetch fails keep their previous record. Returns None
+    without fetching anything if more than max_removed of the stored
+    players would be removed.
+    """
+    now = time.time()
+    roster = {player.get("person", {}).get("id"): player for player in active_players}
+    removed = [player_id for player_id in previous if player_id not in roster]
+    if previous and len(removed) > max_removed * len(previous):
+        print(f"Roster would remove {len(removed)} of {len(previous)} stored players, refusing to update")
+        return None
+    
+    to_fetch = [
+        player_id for player_id, roster_entry in roster.items()
+        if revalidate
+        or player_id not in previous
+        or roster_changed(previous[player_id], roster_entry)
+        or now - state.get(player_id, 0) >= stale_after(player_id, max_age)
+    ]
+    print(f"{len(roster)} active players, refetching {len(to_fetch)} new, moved or stale players")
+    
+    records = dict(previous)
+    # Only players confirmed gone from the rosters lose their fetch time
+    removed_ids = set(removed)
+    new_state = {player_id: fetched_at for player_id, fetched_at in state.items() if player_id not in removed_ids}
+    changed = []
+    for player_id, player_data in zip(to_fetch, client.fetch_players_stats(to_fetch)):
+        if not player_data:
+            continue
+        relevant_stats = extract_relevant_stats(player_data, seasons)
+        new_state[player_id] = now
+        if previous.get(player_id) != relevant_stats:
+            records[player_id] = relevant_stats
+            changed.append(relevant_stats)
+    
+    merged = [records[player_id] for player_id in roster if player_id in records]
+    return merged, changed, removed, new_state
+
+def save_delta(changed, removed, filename="players_data_yearly.delta.json"):
+    """Save only the records changed by an incremental refresh, plus removed ids"""
+    delta = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "changed": changed,
+        "removed": removed
+    }
+    with open(filename, "w") as f:
+        json.dump(delta, f, indent=4)
+    print(f"Delta of {len(changed)} changed and {len(removed)} removed players saved to {filename}")
+
 # Step 6: Main function to fetch and process data
 def main():
-    active_players = fetch_active_players()
+    parser = argparse.ArgumentParser(description="Scrape five seasons of stats for all active MLB players")
+    add_client_arguments(parser)
+    parser.add_argument("--season", default="2023", help="Most recent season to include")
+    parser.add_argument("--years", type=int, default=5, help="Number of seasons to include")
+    parser.add_argument(
+        "--incremental", action="store_true", help="Only refetch new, moved or stale players and merge them"
+    )
+    parser.add_argument(
+        "--max-age-hours", type=float, default=DEFAULT_MAX_AGE / 3600,
+        help="In incremental mode, refetch each player at least this often (spread over the second half)"
+    )
+    parser.add_argument(
+        "--revalidate", action="store_true",
+        help="In incremental mode, refetch every player through the response cache (a 304 when unchanged)"
+    )
+    parser.add_argument(
+        "--max-removed", type=float, default=MAX_REMOVED_FRACTION,
+        help="In incremental mode, refuse to remove more than this fraction of the stored players"
+    )
+    args = parser.parse_args()
+    
+    seasons = season_window(args.season, args.years)
+    client = client_from_args(args)
+    active_players, complete = fetch_active_players(client)
+    if not complete:
+        print("Could not fetch every roster, not updating the dataset")
+        return
+    player_ids = [player.get("person", {}).get("id") for player in active_players]
+    
+    if args.incremental:
+        result = incremental_update(
+            client, active_players, load_previous(), load_state(), seasons, args.max_age_hours * 3600,
+            args.revalidate, args.max_removed
+        )
+        if result is None:
+            return
+        fantasy_data, changed, removed, state = result
+        save_delta(changed, removed)
+        with open("players_data_yearly.state.json", "w") as f:
+            json.dump(state, f)
+        # Only rewrite the full dataset when something actually changed
+        if changed or removed:
+            save_to_json(fantasy_data)
+            save_to_csv(fantasy_data)
+        return
+    
     fantasy_data = []
     
-    for player in active_players:
-        player_id = player.get("person", {}).get("id")
-        player_data = fetch_player_stats(player_id)
-        
+    for player_data in client.fetch_players_stats(player_ids):
         if player_data:
-            relevant_stats = extract_relevant_stats(player_data)
+            relevant_stats = extract_relevant_stats(player_data, seasons)
             fantasy_data.append(relevant_stats)
     
     # Save data to JSON and CSV files